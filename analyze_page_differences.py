@@ -4,50 +4,71 @@ Analyze page structure differences between manufacturers with and without models
 Compare successful (Henny Penny, Garland) vs failed (American Water Heaters, Bard).
 """
 
-import subprocess
-import json
 import os
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import orjson
+from selectolax.lexbor import LexborHTMLParser
+
+from http_cache import disk_cache
+from http_session import CLIENT
+
+FETCH_WORKERS = 6
+
+# Patterns used by analyze_page, compiled once at import. The page itself is
+# parsed once with selectolax; these only run over hrefs and inline script text.
+_MODEL_HREF_RE = re.compile(r'/[^/]+/([^/"]+)/parts')
+
+# The two quoted-path API patterns always span a whole "..." string, so one
+# scan for quoted paths mentioning "models" finds the candidates for both and
+# each candidate is then classified with plain substring checks
+_QUOTED_MODELS_RE = re.compile(r'"/[^"]*models[^"]*"')
+_MODEL_DATA_RE = re.compile(r'"modelData":\s*"([^"]+)"')
+_JS_RES = [(re.compile(p, re.DOTALL), name) for p, name in (
+    (r'window\.models\s*=\s*(\[.*?\]);', 'window.models'),
+    (r'var\s+models\s*=\s*(\[.*?\]);', 'var models'),
+    (r'"models":\s*(\[.*?\])', 'json models'),
+)]
+
+def _get_page(url):
+    try:
+        resp = CLIENT.get(url)
+        redirect_url = str(resp.url) if resp.history else None
+        return resp.status_code, redirect_url, resp.content
+    except httpx.HTTPError:
+        return None, None, None
+
+@disk_cache(key=lambda manufacturer_uri: f"https://www.partstown.com/{manufacturer_uri}/parts",
+            cache_if=lambda page: page[0] == 200)
+def _fetch_parts_page(manufacturer_uri):
+    return _get_page(f"https://www.partstown.com/{manufacturer_uri}/parts")
 
 def fetch_page(manufacturer_uri, with_models_tab=False):
-    """Fetch a manufacturer page with curl"""
+    """Fetch a manufacturer page
+
+    Returns (status_code, redirect_url, html); all None on failure.
+    html is the undecoded response body, which selectolax parses directly.
+    redirect_url is the final URL when the request was redirected.
+    Only the plain parts page is cached; the models tab URL carries a
+    cache-busting timestamp, so it is always fetched fresh.
+    """
     if with_models_tab:
         timestamp = int(time.time() * 1000)
-        url = f"https://www.partstown.com/{manufacturer_uri}/parts?v={timestamp}&narrow=#id=mdptabmodels"
-    else:
-        url = f"https://www.partstown.com/{manufacturer_uri}/parts"
-    
-    curl_cmd = [
-        'curl',
-        '-s',  # Silent
-        '-L',  # Follow redirects
-        '-H', 'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-        '-H', 'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        '-H', 'Accept-Language: en-US,en;q=0.9',
-        '--compressed',
-        '--max-time', '10',
-        '-w', '\n===STATUS=%{http_code}===\n===REDIRECT=%{redirect_url}===',
-        url
-    ]
-    
-    try:
-        result = subprocess.run(curl_cmd, capture_output=True, text=True, timeout=15)
-        if result.returncode == 0:
-            return result.stdout
-        return None
-    except:
-        return None
+        return _get_page(f"https://www.partstown.com/{manufacturer_uri}/parts?v={timestamp}&narrow=#id=mdptabmodels")
+    return _fetch_parts_page(manufacturer_uri)
 
-def analyze_page(html_content, manufacturer_name):
+def analyze_page(status_code, redirect_url, html_content, manufacturer_name):
     """Analyze page structure and content"""
     if not html_content:
         return {"error": "No content"}
     
     analysis = {
         "manufacturer": manufacturer_name,
-        "status_code": None,
-        "redirect_url": None,
+        "status_code": status_code,
+        "redirect_url": redirect_url,
         "has_models_section": False,
         "has_parts_section": False,
         "model_links": [],
@@ -56,58 +77,54 @@ def analyze_page(html_content, manufacturer_name):
         "page_type": "unknown"
     }
     
-    # Extract status and redirect
-    status_match = re.search(r'===STATUS=(\d+)===', html_content)
-    if status_match:
-        analysis["status_code"] = status_match.group(1)
-    
-    redirect_match = re.search(r'===REDIRECT=(.+?)===', html_content)
-    if redirect_match and redirect_match.group(1):
-        analysis["redirect_url"] = redirect_match.group(1)
-    
     # Check for direct model redirect (single model manufacturer)
     if analysis["redirect_url"] and '/parts' not in analysis["redirect_url"]:
         analysis["page_type"] = "single_model_redirect"
         # Extract model from redirect
-        model_match = re.search(r'/([^/]+)$', analysis["redirect_url"])
-        if model_match:
-            analysis["single_model"] = model_match.group(1)
+        model = analysis["redirect_url"].rsplit('/', 1)
+        if len(model) == 2 and model[1]:
+            analysis["single_model"] = model[1]
+    
+    tree = LexborHTMLParser(html_content)
     
     # Look for model links
-    model_pattern = rf'href="/[^/]+/([^/"]+)/parts"'
-    model_matches = re.findall(model_pattern, html_content)
-    analysis["model_links"] = list(set(model_matches))[:10]  # First 10 unique
+    hrefs = (a.attributes.get('href') or '' for a in tree.css('a[href*="/parts"]'))
+    model_matches = (m.group(1) for m in map(_MODEL_HREF_RE.fullmatch, hrefs) if m)
+    analysis["model_links"] = list(dict.fromkeys(model_matches))[:10]  # First 10 unique
+    
+    # API endpoints and model data live in the inline scripts
+    scripts = '\n'.join(node.text() for node in tree.css('script'))
     
     # Look for API endpoints
-    api_patterns = [
-        r'"/api/[^"]+models[^"]*"',
-        r'"/[^"]+/models[^"]*"',
-        r'"modelData":\s*"([^"]+)"',
-        r'data-models-url="([^"]+)"'
-    ]
+    quoted = _QUOTED_MODELS_RE.findall(scripts)
+    # "/api/[^"]+models[^"]*"
+    matches = [q for q in quoted if q.startswith('"/api/') and q.find('models', 7) != -1]
+    analysis["api_endpoints"].extend(matches[:3])
+    # "/[^"]+/models[^"]*"
+    matches = [q for q in quoted if q.find('/models', 3) != -1]
+    analysis["api_endpoints"].extend(matches[:3])
     
-    for pattern in api_patterns:
-        matches = re.findall(pattern, html_content)
-        analysis["api_endpoints"].extend(matches[:3])
+    analysis["api_endpoints"].extend(_MODEL_DATA_RE.findall(scripts)[:3])
+    urls = [node.attributes.get('data-models-url') for node in tree.css('[data-models-url]')]
+    analysis["api_endpoints"].extend([url for url in urls if url][:3])
     
     # Look for JavaScript model data
-    js_patterns = [
-        (r'window\.models\s*=\s*(\[.*?\]);', 'window.models'),
-        (r'var\s+models\s*=\s*(\[.*?\]);', 'var models'),
-        (r'"models":\s*(\[.*?\])', 'json models'),
-        (r'data-models=\'([^\']+)\'', 'data-models attribute')
-    ]
-    
-    for pattern, name in js_patterns:
-        match = re.search(pattern, html_content, re.DOTALL)
+    for pattern, name in _JS_RES:
+        match = pattern.search(scripts)
         if match:
             analysis["javascript_data"][name] = match.group(1)[:100] + "..."
     
-    # Check for sections
-    if 'id="mdptabmodels"' in html_content or 'Models</h' in html_content:
+    node = tree.css_first('[data-models]')
+    if node and node.attributes.get('data-models'):
+        analysis["javascript_data"]['data-models attribute'] = node.attributes['data-models'][:100] + "..."
+    
+    # Check for sections: the tab ids, with headings as fallback
+    headings = [h.text() for h in tree.css('h1, h2, h3, h4, h5, h6')]
+    
+    if tree.css_first('#mdptabmodels') or any(h.endswith('Models') for h in headings):
         analysis["has_models_section"] = True
     
-    if 'id="mdptabparts"' in html_content or 'Parts</h' in html_content:
+    if tree.css_first('#mdptabparts') or any(h.endswith('Parts') for h in headings):
         analysis["has_parts_section"] = True
     
     # Determine page type
@@ -142,14 +159,23 @@ def main():
     
     results = []
     
+    # The fetches are independent, so run them all up front in parallel
+    print(f"\n🌐 Fetching {len(test_cases) * 2} pages...")
+    jobs = [(case, url_type) for url_type in ("standard", "with_models_tab") for case in test_cases]
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+        pages = dict(zip(
+            ((case['name'], url_type) for case, url_type in jobs),
+            executor.map(lambda job: fetch_page(job[0]['uri'], job[1] == "with_models_tab"), jobs)
+        ))
+    
     # Test 1: Without mdptabmodels parameter
     print("\n📊 TEST 1: Standard URL (no mdptabmodels)")
     print("-" * 70)
     
     for case in test_cases:
         print(f"\n🔍 Analyzing {case['name']} ({case['status']})...")
-        html = fetch_page(case['uri'], with_models_tab=False)
-        analysis = analyze_page(html, case['name'])
+        status_code, redirect_url, html = pages[(case['name'], "standard")]
+        analysis = analyze_page(status_code, redirect_url, html, case['name'])
         analysis["expected_status"] = case["status"]
         analysis["url_type"] = "standard"
         results.append(analysis)
@@ -168,8 +194,8 @@ def main():
     
     for case in test_cases:
         print(f"\n🔍 Analyzing {case['name']} with models tab...")
-        html = fetch_page(case['uri'], with_models_tab=True)
-        analysis = analyze_page(html, case['name'])
+        status_code, redirect_url, html = pages[(case['name'], "with_models_tab")]
+        analysis = analyze_page(status_code, redirect_url, html, case['name'])
         analysis["expected_status"] = case["status"]
         analysis["url_type"] = "with_models_tab"
         results.append(analysis)
@@ -227,8 +253,8 @@ def main():
             print(f"   ⚠️ Different results with mdptabmodels!")
     
     # Save detailed results
-    with open('page_analysis_results.json', 'w') as f:
-        json.dump(results, f, indent=2)
+    with open('page_analysis_results.json', 'wb') as f:
+        f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
     
     print(f"\n💾 Detailed results saved to page_analysis_results.json")
 
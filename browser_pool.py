@@ -1,145 +1,161 @@
 #!/usr/bin/env python3
 """
 Browser Pool Manager for Playwright
-Manages a pool of browser instances to handle concurrent requests safely
+Shares one persistent browser context across requests, handing each request its own page
 """
 
 import asyncio
+import os
 import time
-from typing import Optional, Dict, Any
-from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+from typing import Optional
+from playwright.async_api import async_playwright, BrowserContext, Page
 import uuid
 
+# Chromium profile kept between runs so its HTTP cache and storage stay warm
+PROFILE_DIR = os.path.join(os.path.dirname(__file__), 'cache', 'chromium_profile')
+
+IDLE_PAGE_SECONDS = 300  # Idle pages older than this are replaced with fresh ones
+JANITOR_INTERVAL = 60
+
 class BrowserPool:
-    """Manages a pool of browser instances for concurrent requests"""
-    
-    def __init__(self, max_browsers: int = 3):
-        self.max_browsers = max_browsers
-        self.browsers: Dict[str, Dict[str, Any]] = {}
+    """Hands out pages from a single shared persistent browser context
+
+    max_pages pages are opened up front and kept in a queue of idle
+    (page, last_used) entries; acquiring waits on the queue and releasing
+    puts the page back.
+    """
+
+    def __init__(self, max_pages: int = 4):
+        self.max_pages = max_pages
+        self.idle: Optional[asyncio.Queue] = None
         self.lock = asyncio.Lock()
         self.playwright = None
-        
+        self.context: Optional[BrowserContext] = None
+        self.janitor: Optional[asyncio.Task] = None
+
     async def initialize(self):
-        """Initialize the playwright instance"""
-        if not self.playwright:
-            self.playwright = await async_playwright().start()
-    
-    async def get_browser(self) -> tuple[str, Browser, BrowserContext, Page]:
-        """Get or create a browser instance"""
-        async with self.lock:
-            # Initialize playwright if needed
-            await self.initialize()
-            
-            # Clean up closed browsers
-            closed_ids = []
-            for browser_id, browser_data in self.browsers.items():
-                try:
-                    if browser_data['browser'].is_connected():
-                        # Check if browser is idle (not used for 30 seconds)
-                        if time.time() - browser_data['last_used'] > 30:
-                            await browser_data['browser'].close()
-                            closed_ids.append(browser_id)
-                    else:
-                        closed_ids.append(browser_id)
-                except:
-                    closed_ids.append(browser_id)
-            
-            for browser_id in closed_ids:
-                del self.browsers[browser_id]
-            
-            # Create new browser if under limit
-            if len(self.browsers) < self.max_browsers:
-                browser_id = str(uuid.uuid4())[:8]
-                print(f"🌐 Creating new browser instance {browser_id}")
-                
-                browser = await self.playwright.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--disable-blink-features=AutomationControlled',
-                        '--no-sandbox',
-                        '--disable-setuid-sandbox',
-                        '--disable-dev-shm-usage',
-                        '--disable-gpu',
-                        '--no-first-run',
-                        '--no-zygote',
-                        '--single-process'  # Important for preventing zombie processes
-                    ]
-                )
-                
-                context = await browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                    viewport={'width': 1920, 'height': 1080}
-                )
-                
-                page = await context.new_page()
-                await page.set_extra_http_headers({
-                    "X-Requested-With": "XMLHttpRequest",
-                    "Accept": "application/json, text/plain, */*"
-                })
-                
-                self.browsers[browser_id] = {
-                    'browser': browser,
-                    'context': context,
-                    'page': page,
-                    'last_used': time.time(),
-                    'in_use': True
-                }
-                
-                return browser_id, browser, context, page
-            
-            # Reuse existing browser
-            for browser_id, browser_data in self.browsers.items():
-                if not browser_data.get('in_use', False):
-                    browser_data['in_use'] = True
-                    browser_data['last_used'] = time.time()
-                    
-                    # Create new page for this request
-                    page = await browser_data['context'].new_page()
-                    await page.set_extra_http_headers({
-                        "X-Requested-With": "XMLHttpRequest",
-                        "Accept": "application/json, text/plain, */*"
-                    })
-                    
-                    print(f"♻️ Reusing browser instance {browser_id}")
-                    return browser_id, browser_data['browser'], browser_data['context'], page
-            
-            # All browsers in use, wait and retry
-            print("⏳ All browsers in use, waiting...")
-            await asyncio.sleep(1)
-            return await self.get_browser()
-    
-    async def release_browser(self, browser_id: str, page: Optional[Page] = None):
-        """Release a browser back to the pool"""
+        """Start playwright, the shared persistent context and the idle pages if needed"""
+        if self.context and self.idle is not None:
+            return
+
         async with self.lock:
-            if browser_id in self.browsers:
-                # Close the page if provided
-                if page:
+            if not self.playwright:
+                self.playwright = await async_playwright().start()
+
+            if not self.context:
+                await self._launch()
+
+            if self.idle is None:
+                self.idle = asyncio.Queue()
+                for _ in range(self.max_pages):
+                    self.idle.put_nowait((await self.context.new_page(), time.monotonic()))
+                self.janitor = asyncio.create_task(self._janitor())
+                print(f"📄 Warmed {self.max_pages} pages")
+
+    async def _launch(self):
+        print("🌐 Launching shared browser")
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        self.context = await self.playwright.chromium.launch_persistent_context(
+            user_data_dir=PROFILE_DIR,
+            headless=True,
+            args=[
+                '--disable-blink-features=AutomationControlled',
+                '--no-sandbox',
+                '--disable-setuid-sandbox',
+                '--disable-dev-shm-usage',
+                '--disable-gpu',
+                '--no-first-run'
+            ],
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+            viewport={'width': 1920, 'height': 1080},
+            extra_http_headers={
+                "X-Requested-With": "XMLHttpRequest",
+                "Accept": "application/json, text/plain, */*"
+            }
+        )
+        # Relaunch on the next acquire if the browser goes away
+        self.context.on("close", self._on_context_closed)
+
+    def _on_context_closed(self, context):
+        if self.context is context:
+            self.context = None
+
+    async def _new_page(self) -> Page:
+        """Open a replacement page, relaunching the browser if it has gone away"""
+        await self.initialize()
+        return await self.context.new_page()
+
+    async def acquire_page(self) -> tuple[str, Page]:
+        """Wait for an idle page; closed pages are replaced on the way out"""
+        await self.initialize()
+        page, _ = await self.idle.get()
+
+        if page.is_closed():
+            try:
+                page = await self._new_page()
+            except:
+                # Keep the slot so a later acquire can retry the replacement
+                self.idle.put_nowait((page, time.monotonic()))
+                raise
+
+        page_id = str(uuid.uuid4())[:8]
+        print(f"📄 Acquired page {page_id}")
+        return page_id, page
+
+    async def release_page(self, page: Page):
+        """Return a page to the idle queue"""
+        try:
+            # Stop the last site's scripts from running while the page sits idle
+            if not page.is_closed():
+                await page.goto('about:blank')
+        except:
+            pass
+        finally:
+            self.idle.put_nowait((page, time.monotonic()))
+
+    async def _janitor(self):
+        """Periodically replace pages that have sat idle too long or were closed"""
+        while True:
+            await asyncio.sleep(JANITOR_INTERVAL)
+            now = time.monotonic()
+
+            for _ in range(self.idle.qsize()):
+                if self.idle.empty():
+                    break
+                page, last_used = self.idle.get_nowait()
+
+                if page.is_closed() or now - last_used > IDLE_PAGE_SECONDS:
                     try:
                         await page.close()
+                        page = await self._new_page()
+                        print("♻️ Recycled idle page")
                     except:
                         pass
-                
-                # Mark browser as available
-                self.browsers[browser_id]['in_use'] = False
-                self.browsers[browser_id]['last_used'] = time.time()
-                print(f"🔓 Released browser {browser_id}")
-    
+                    last_used = time.monotonic()
+
+                self.idle.put_nowait((page, last_used))
+
     async def cleanup(self):
-        """Clean up all browser instances"""
+        """Close the shared browser and stop playwright"""
         async with self.lock:
-            for browser_id, browser_data in self.browsers.items():
+            if self.janitor:
+                self.janitor.cancel()
+                self.janitor = None
+
+            if self.context:
                 try:
-                    await browser_data['browser'].close()
-                    print(f"🧹 Closed browser {browser_id}")
+                    await self.context.close()
+                    print("🧹 Closed shared browser")
                 except:
                     pass
-            
-            self.browsers.clear()
-            
+
+            self.context = None
+            self.idle = None
+
             if self.playwright:
                 await self.playwright.stop()
                 self.playwright = None
                 print("✅ Playwright stopped")
 
 # Global browser pool instance
-browser_pool = BrowserPool(max_browsers=2)
\ No newline at end of file
+browser_pool = BrowserPool(max_pages=4)
@@ -1,26 +1,41 @@
 #!/usr/bin/env python3
 """
 Cache all manual links for all models
-Run this locally where curl works, then deploy the cache to Railway
+Run this locally, then deploy the cache to Railway
 """
 
-import json
+import asyncio
 import os
 import time
-from fetch_manuals_curl import fetch_manuals_via_curl
+
+import orjson
+
+from cache_io import write_json
+from fetch_manuals_curl import fetch_manuals
+from http_session import SESSION
+from manual_progress import append_progress, load_progress, models_with_manuals, progress_path
+from rate_limiter import RateLimiter
 
 CACHE_DIR = 'cache'
 MODELS_CACHE_DIR = os.path.join(CACHE_DIR, 'models')
 MANUALS_CACHE_DIR = os.path.join(CACHE_DIR, 'manuals')
 
-def cache_all_manuals():
+# Concurrent model fetches, kept under a polite request rate
+MAX_WORKERS = 6
+REQUESTS_PER_SECOND = 4
+
+async def cache_all_manuals():
     """Cache manual links for all models"""
     
     # Create manuals cache directory
     os.makedirs(MANUALS_CACHE_DIR, exist_ok=True)
     
-    # Get list of all manufacturer files
-    model_files = [f for f in os.listdir(MODELS_CACHE_DIR) if f.endswith('.json')]
+    # Get list of all manufacturer files, smallest first so progress shows early
+    with os.scandir(MODELS_CACHE_DIR) as it:
+        model_files = sorted(
+            (e for e in it if e.is_file() and e.name.endswith('.json')),
+            key=lambda e: e.stat().st_size
+        )
     
     print(f"Found {len(model_files)} manufacturer cache files")
     
@@ -28,69 +43,101 @@ def cache_all_manuals():
     total_manuals = 0
     manufacturers_with_manuals = 0
     
-    for i, filename in enumerate(model_files, 1):
-        manufacturer_id = filename.replace('.json', '')
-        
-        # Load manufacturer data
-        with open(os.path.join(MODELS_CACHE_DIR, filename), 'r') as f:
-            data = json.load(f)
-        
-        manufacturer_uri = data['manufacturer']['uri']
-        models = data.get('models', [])
-        
-        if not models:
-            print(f"[{i}/{len(model_files)}] {manufacturer_id}: No models, skipping")
-            continue
+    limiter = RateLimiter(REQUESTS_PER_SECOND)
+    slots = asyncio.Semaphore(MAX_WORKERS)
+    
+    async def fetch(manufacturer_uri, model_code, model_name):
+        async with slots:
+            await limiter.wait_async()
+            try:
+                return model_code, model_name, await fetch_manuals(SESSION, manufacturer_uri, model_code, limiter=limiter)
+            except Exception as e:
+                return model_code, model_name, e
+    
+    try:
+        for i, entry in enumerate(model_files, 1):
+            manufacturer_id = entry.name.replace('.json', '')
             
-        print(f"\n[{i}/{len(model_files)}] Processing {manufacturer_id} ({manufacturer_uri}) - {len(models)} models")
-        
-        # Cache for this manufacturer
-        manuals_cache = {
-            'manufacturer': data['manufacturer'],
-            'models_with_manuals': {},
-            'cached_at': time.strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-        models_with_manuals = 0
-        
-        # Fetch manuals for each model
-        for j, model in enumerate(models[:10], 1):  # Limit to first 10 models for testing
-            model_code = model.get('code', model.get('name', ''))
+            # Load manufacturer data only when its turn comes
+            with open(entry.path, 'rb') as f:
+                data = orjson.loads(f.read())
             
-            if not model_code:
+            manufacturer = data['manufacturer']
+            manufacturer_uri = manufacturer['uri']
+            models = data.get('models', [])
+            
+            if not models:
+                print(f"[{i}/{len(model_files)}] {manufacturer_id}: No models, skipping")
                 continue
                 
-            print(f"  [{j}/{min(10, len(models))}] Fetching manuals for {model_code}...", end='')
+            print(f"\n[{i}/{len(model_files)}] Processing {manufacturer_id} ({manufacturer_uri}) - {len(models)} models")
             
-            try:
-                manuals = fetch_manuals_via_curl(manufacturer_uri, model_code)
+            # Models fetched by an earlier, interrupted run are skipped
+            partial_file = progress_path(MANUALS_CACHE_DIR, manufacturer_id)
+            done = load_progress(partial_file)
+            if done:
+                print(f"  ↩️ Resuming, {len(done)} models already fetched")
+            
+            # Fetch manuals for each model concurrently
+            jobs = []
+            for model in models[:10]:  # Limit to first 10 models for testing
+                model_name = model.get('name')
+                model_code = model.get('code') or model_name or ''
+                
+                if not model_code or model_code in done:
+                    continue
                 
-                if manuals:
-                    manuals_cache['models_with_manuals'][model_code] = {
-                        'name': model.get('name'),
-                        'manuals': manuals
-                    }
-                    models_with_manuals += 1
-                    total_manuals += len(manuals)
-                    print(f" ✅ {len(manuals)} manuals")
-                else:
-                    print(f" ⚠️ No manuals")
+                jobs.append(fetch(manufacturer_uri, model_code, model_name))
+            
+            failed = 0
+            with open(partial_file, 'ab') as progress:
+                for j, job in enumerate(asyncio.as_completed(jobs), 1):
+                    model_code, model_name, manuals = await job
+                    print(f"  [{j}/{len(jobs)}] {model_code}:", end='')
                     
-            except Exception as e:
-                print(f" ❌ Error: {e}")
+                    # Failed models stay out of the progress log so a rerun retries them
+                    if isinstance(manuals, Exception):
+                        print(f" ❌ Error: {manuals}")
+                        failed += 1
+                        continue
+                    if manuals is None:
+                        print(f" ❌ Fetch failed")
+                        failed += 1
+                        continue
+                    
+                    append_progress(progress, model_code, model_name, manuals)
+                    done[model_code] = {'code': model_code, 'name': model_name, 'manuals': manuals}
+                    
+                    if manuals:
+                        print(f" ✅ {len(manuals)} manuals")
+                    else:
+                        print(f" ⚠️ No manuals")
+            
+            total_models += len(models)
+            
+            # Cache for this manufacturer
+            manuals_cache = {
+                'manufacturer': manufacturer,
+                'models_with_manuals': models_with_manuals(done),
+                'cached_at': time.strftime('%Y-%m-%d %H:%M:%S')
+            }
+            cached_models = len(manuals_cache['models_with_manuals'])
+            total_manuals += sum(len(m['manuals']) for m in manuals_cache['models_with_manuals'].values())
+            
+            if cached_models > 0:
+                manufacturers_with_manuals += 1
+                # Save cache file
+                cache_file = os.path.join(MANUALS_CACHE_DIR, f"{manufacturer_id}.json")
+                write_json(cache_file, manuals_cache)
+                print(f"  💾 Cached {cached_models} models with manuals")
             
-            # Small delay to be nice to the server
-            time.sleep(0.5)
-        
-        total_models += len(models)
-        
-        if models_with_manuals > 0:
-            manufacturers_with_manuals += 1
-            # Save cache file
-            cache_file = os.path.join(MANUALS_CACHE_DIR, f"{manufacturer_id}.json")
-            with open(cache_file, 'w') as f:
-                json.dump(manuals_cache, f, indent=2)
-            print(f"  💾 Cached {models_with_manuals} models with manuals")
+            # Manufacturer finished, the progress log is no longer needed
+            if failed:
+                print(f"  ⚠️ {failed} models failed, keeping {partial_file} for the next run")
+            else:
+                os.remove(partial_file)
+    finally:
+        await SESSION.aclose()
     
     print("\n" + "="*60)
     print(f"✅ Caching complete!")
@@ -106,6 +153,7 @@ if __name__ == "__main__":
     print("="*60)
     
     try:
-        cache_all_manuals()
+        asyncio.run(cache_all_manuals())
     except KeyboardInterrupt:
-        print("\n\n⚠️ Caching interrupted by user")
\ No newline at end of file
+        print("\n\n⚠️ Caching interrupted by user")
+        print("   Fetched models are kept; run again to resume")
\ No newline at end of file
@@ -3,16 +3,27 @@
 Cache manual links for Henny Penny only
 """
 
-import json
+import asyncio
 import os
 import time
-from fetch_manuals_curl import fetch_manuals_via_curl
+
+import orjson
+
+from cache_io import write_json
+from fetch_manuals_curl import fetch_manuals
+from http_session import SESSION
+from manual_progress import append_progress, load_progress, models_with_manuals, progress_path
+from rate_limiter import RateLimiter
 
 CACHE_DIR = 'cache'
 MODELS_CACHE_DIR = os.path.join(CACHE_DIR, 'models')
 MANUALS_CACHE_DIR = os.path.join(CACHE_DIR, 'manuals')
 
-def cache_henny_penny_manuals():
+# Concurrent model fetches, kept under a polite request rate
+MAX_WORKERS = 6
+REQUESTS_PER_SECOND = 4
+
+async def cache_henny_penny_manuals():
     """Cache manual links for Henny Penny models"""
     
     # Create manuals cache directory
@@ -22,72 +33,102 @@ def cache_henny_penny_manuals():
     manufacturer_id = 'PT_CAT1095'
     cache_file = os.path.join(MODELS_CACHE_DIR, f'{manufacturer_id}.json')
     
-    with open(cache_file, 'r') as f:
-        data = json.load(f)
+    with open(cache_file, 'rb') as f:
+        data = orjson.loads(f.read())
     
-    manufacturer_uri = data['manufacturer']['uri']
+    manufacturer = data['manufacturer']
+    manufacturer_uri = manufacturer['uri']
     models = data.get('models', [])
     
     print(f"Processing Henny Penny ({manufacturer_uri}) - {len(models)} models")
     print("="*60)
     
-    # Cache for this manufacturer
-    manuals_cache = {
-        'manufacturer': data['manufacturer'],
-        'models_with_manuals': {},
-        'cached_at': time.strftime('%Y-%m-%d %H:%M:%S')
-    }
+    # Models fetched by an earlier, interrupted run are skipped
+    partial_file = progress_path(MANUALS_CACHE_DIR, manufacturer_id)
+    done = load_progress(partial_file)
+    if done:
+        print(f"↩️ Resuming, {len(done)} models already fetched")
     
-    models_with_manuals = 0
-    total_manuals = 0
+    limiter = RateLimiter(REQUESTS_PER_SECOND)
+    slots = asyncio.Semaphore(MAX_WORKERS)
     
-    # Fetch manuals for each model
-    for j, model in enumerate(models, 1):
-        model_code = model.get('code', model.get('name', ''))
-        model_name = model.get('name', model_code)
-        
-        if not model_code:
-            continue
+    async def fetch(model_code, model_name):
+        async with slots:
+            await limiter.wait_async()
+            try:
+                return model_code, model_name, await fetch_manuals(SESSION, manufacturer_uri, model_code, limiter=limiter)
+            except Exception as e:
+                return model_code, model_name, e
+    
+    # Fetch manuals for each model concurrently
+    try:
+        jobs = []
+        for model in models:
+            model_name = model.get('name')
+            model_code = model.get('code') or model_name or ''
+            model_name = model_name or model_code
             
-        print(f"[{j}/{len(models)}] Fetching manuals for {model_code} ({model_name})...", end='', flush=True)
-        
-        try:
-            manuals = fetch_manuals_via_curl(manufacturer_uri, model_code)
+            if not model_code or model_code in done:
+                continue
             
-            if manuals:
-                manuals_cache['models_with_manuals'][model_code] = {
-                    'name': model_name,
-                    'manuals': manuals
-                }
-                models_with_manuals += 1
-                total_manuals += len(manuals)
-                print(f" ✅ {len(manuals)} manuals")
-            else:
-                print(f" ⚠️ No manuals")
-                
-        except Exception as e:
-            print(f" ❌ Error: {e}")
+            jobs.append(fetch(model_code, model_name))
         
-        # Small delay to be nice to the server
-        time.sleep(0.5)
+        failed = 0
+        with open(partial_file, 'ab') as progress:
+            for j, job in enumerate(asyncio.as_completed(jobs), 1):
+                model_code, model_name, manuals = await job
+                print(f"[{j}/{len(jobs)}] {model_code} ({model_name}):", end='')
+                
+                # Failed models stay out of the progress log so a rerun retries them
+                if isinstance(manuals, Exception):
+                    print(f" ❌ Error: {manuals}")
+                    failed += 1
+                    continue
+                if manuals is None:
+                    print(f" ❌ Fetch failed")
+                    failed += 1
+                    continue
+                
+                append_progress(progress, model_code, model_name, manuals)
+                done[model_code] = {'code': model_code, 'name': model_name, 'manuals': manuals}
+                
+                if manuals:
+                    print(f" ✅ {len(manuals)} manuals")
+                else:
+                    print(f" ⚠️ No manuals")
+    finally:
+        await SESSION.aclose()
+    
+    # Cache for this manufacturer
+    manuals_cache = {
+        'manufacturer': manufacturer,
+        'models_with_manuals': models_with_manuals(done),
+        'cached_at': time.strftime('%Y-%m-%d %H:%M:%S')
+    }
+    cached_models = len(manuals_cache['models_with_manuals'])
+    total_manuals = sum(len(m['manuals']) for m in manuals_cache['models_with_manuals'].values())
     
     # Save cache file
     cache_file = os.path.join(MANUALS_CACHE_DIR, f"{manufacturer_id}.json")
-    with open(cache_file, 'w') as f:
-        json.dump(manuals_cache, f, indent=2)
+    write_json(cache_file, manuals_cache)
+    if not failed:
+        os.remove(partial_file)
     
     print("\n" + "="*60)
     print(f"✅ Caching complete for Henny Penny!")
     print(f"  - Models processed: {len(models)}")
-    print(f"  - Models with manuals: {models_with_manuals}")
+    print(f"  - Models with manuals: {cached_models}")
     print(f"  - Total manuals cached: {total_manuals}")
     print(f"  - Cache file: cache/manuals/{manufacturer_id}.json")
+    if failed:
+        print(f"  ⚠️ {failed} models failed; run again to retry them")
 
 if __name__ == "__main__":
     print("Starting Henny Penny manual caching...")
     print("="*60)
     
     try:
-        cache_henny_penny_manuals()
+        asyncio.run(cache_henny_penny_manuals())
     except KeyboardInterrupt:
-        print("\n\n⚠️ Caching interrupted by user")
\ No newline at end of file
+        print("\n\n⚠️ Caching interrupted by user")
+        print("   Fetched models are kept; run again to resume")
\ No newline at end of file
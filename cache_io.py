@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Atomic writes for the cache files
+A crash or Ctrl+C mid-write leaves the previous file intact instead of a truncated one
+"""
+
+import os
+import tempfile
+
+import orjson
+
+def write_bytes(path, payload):
+    """Write payload to a temp file beside path, then swap it in"""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def write_json(path, data, indent=False):
+    """Serialize data with orjson and write it atomically"""
+    write_bytes(path, orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else None))
+
+# Each cache file keeps one format whichever script writes it: the model files
+# are many and only read by code, so compact; the small timestamp file is
+# checked by hand after a run, so indented
+def write_model_cache(path, data):
+    """Write a cache/models/<manufacturer code>.json file"""
+    write_json(path, data)
+
+def write_timestamp(path, data):
+    """Write cache/cache_timestamp.json"""
+    write_json(path, data, indent=True)
@@ -5,12 +5,15 @@ Caps each manufacturer at 50 models to keep cache size manageable
 """
 
 import asyncio
-import json
 import os
 import sys
 import time
 from datetime import datetime
 
+import orjson
+
+from cache_io import write_model_cache, write_timestamp
+
 # Add the scraper to the path
 sys.path.append('../API Scraper V2')
 from interactive_scraper import PartsTownExplorer
@@ -41,8 +44,7 @@ class CachePopulator:
             'errors': self.stats['errors']
         }
         
-        with open(f"{self.cache_dir}/cache_timestamp.json", 'w') as f:
-            json.dump(timestamp_data, f, indent=2)
+        write_timestamp(f"{self.cache_dir}/cache_timestamp.json", timestamp_data)
     
     async def populate_cache(self):
         """Main cache population function"""
@@ -61,8 +63,8 @@ class CachePopulator:
             print(f"✅ Found {len(manufacturers)} manufacturers")
             
             # Save manufacturers to cache
-            with open(f"{self.cache_dir}/manufacturers.json", 'w') as f:
-                json.dump(manufacturers, f, indent=2)
+            with open(f"{self.cache_dir}/manufacturers.json", 'wb') as f:
+                f.write(orjson.dumps(manufacturers))
             
             print(f"💾 Saved manufacturers to cache")
             
@@ -102,8 +104,7 @@ class CachePopulator:
                             'cached_at': datetime.now().isoformat()
                         }
                         
-                        with open(cache_file, 'w') as f:
-                            json.dump(cache_data, f, indent=2)
+                        write_model_cache(cache_file, cache_data)
                         
                         self.stats['models_cached'] += len(models)
                         print(f"   ✅ Cached {len(models)} models")
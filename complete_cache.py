@@ -4,98 +4,128 @@ Complete the missing cache by fetching models for manufacturers without cached d
 This script identifies manufacturers without model cache files and fetches their models.
 """
 
-import json
+import asyncio
 import os
+import random
 import sys
-import time
 from datetime import datetime
-import subprocess
 import hashlib
 
+import httpx
+import orjson
+from selectolax.lexbor import LexborHTMLParser
+
+from cache_io import write_model_cache, write_timestamp
+from http_session import SESSION
+from model_cache import cached_files
+from rate_limiter import RateLimiter
+
 # Cache directories
 CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache')
 MODELS_CACHE_DIR = os.path.join(CACHE_DIR, 'models')
 
+# Manufacturer pages fetched concurrently over the shared session, kept under
+# a polite request rate
+MAX_CONCURRENT = 15
+REQUESTS_PER_SECOND = 5
+
+# Responses that mean "slow down" rather than "no such page"; retried up to
+# MAX_ATTEMPTS times in all
+RETRY_STATUSES = (403, 429, 503)
+MAX_ATTEMPTS = 4
+
+# Cloudflare serves its challenge page with a 200, so check the body too.
+# Only markers unique to the interstitial; normal pages may load challenge-platform scripts
+CHALLENGE_MARKERS = ('<title>Just a moment...</title>', '_cf_chl_opt')
+
+# Link text that belongs to site navigation rather than a model
+NAV_LINK_TEXT = frozenset({'Parts', 'Manuals', 'Home', 'Back'})
+
 def get_missing_manufacturers():
     """Get list of manufacturers without cached models"""
     # Load manufacturers list
-    with open(os.path.join(CACHE_DIR, 'manufacturers.json'), 'r') as f:
-        manufacturers = json.load(f)
+    with open(os.path.join(CACHE_DIR, 'manufacturers.json'), 'rb') as f:
+        manufacturers = orjson.loads(f.read())
     
-    # Check which ones have cache files
-    missing = []
-    for mfg in manufacturers:
-        cache_file = os.path.join(MODELS_CACHE_DIR, f"{mfg['code']}.json")
-        if not os.path.exists(cache_file):
-            missing.append(mfg)
+    cached = cached_files(MODELS_CACHE_DIR)
+    
+    missing = [mfg for mfg in manufacturers if mfg['code'] not in cached]
     
     return missing
 
-def fetch_models_via_curl(manufacturer_uri):
-    """Fetch models for a manufacturer using curl (bypasses CloudFlare)"""
-    url = f"https://www.partstown.com/{manufacturer_uri}/parts"
+async def fetch_models_page(session, manufacturer_uri, limiter=None):
+    """Fetch a manufacturer's parts page; returns the HTML or None on failure
     
-    # Build curl command
-    curl_cmd = [
-        'curl',
-        '-s',  # Silent
-        '-L',  # Follow redirects
-        '-H', 'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-        '-H', 'Accept: text/html,application/xhtml+xml',
-        '-H', 'Accept-Language: en-US,en;q=0.9',
-        '--compressed',
-        '--max-time', '30',
-        url
-    ]
+    Rate limiting and Cloudflare challenges are retried with exponential backoff,
+    so a blocked page is never mistaken for one without models. Responses are
+    reported to limiter, so one worker being throttled slows down all of them
+    """
+    url = f"https://www.partstown.com/{manufacturer_uri}/parts"
     
-    try:
-        result = subprocess.run(
-            curl_cmd,
-            capture_output=True,
-            text=True,
-            timeout=35
-        )
+    for attempt in range(MAX_ATTEMPTS):
+        if attempt:
+            await asyncio.sleep(2 ** attempt + random.random())
+            if limiter:
+                await limiter.wait_async()
         
-        if result.returncode == 0:
-            return result.stdout
-        else:
-            print(f"  ❌ Curl failed with return code {result.returncode}")
+        try:
+            resp = await session.get(url, timeout=30)
+        except httpx.TimeoutException:
+            print(f"  ❌ Timeout after 30 seconds for {manufacturer_uri}")
             return None
-            
-    except subprocess.TimeoutExpired:
-        print(f"  ❌ Timeout after 35 seconds")
-        return None
-    except Exception as e:
-        print(f"  ❌ Error: {e}")
-        return None
+        except httpx.HTTPError as e:
+            print(f"  ❌ Error for {manufacturer_uri}: {e}")
+            return None
+        
+        if limiter:
+            limiter.observe(resp)
+        
+        if resp.status_code in RETRY_STATUSES:
+            print(f"  ⏳ HTTP {resp.status_code} for {manufacturer_uri}, backing off")
+            continue
+        
+        if resp.status_code >= 400:
+            print(f"  ❌ HTTP {resp.status_code} for {manufacturer_uri}")
+            return None
+        
+        html_content = resp.text
+        if any(marker in html_content for marker in CHALLENGE_MARKERS):
+            print(f"  ⏳ Cloudflare challenge for {manufacturer_uri}, backing off")
+            continue
+        
+        return html_content
+    
+    print(f"  ❌ Still blocked after {MAX_ATTEMPTS} attempts for {manufacturer_uri}")
+    return None
 
 def parse_models_from_html(html_content):
     """Parse model data from the HTML content"""
-    import re
-    
     models = []
+    seen = set()
     
     # Look for model links in the HTML
     # Pattern: /manufacturer/model-code/parts
-    model_pattern = r'href="(/[^/]+/([^/]+)/parts)"[^>]*>([^<]+)</a>'
-    
-    matches = re.findall(model_pattern, html_content)
-    seen = set()
-    
-    for match in matches:
-        full_url, model_code, model_name = match
+    tree = LexborHTMLParser(html_content)
+    for link in tree.css('a[href*="/parts"]'):
+        full_url = link.attributes.get('href') or ''
+        parts = full_url.split('/')
+        if len(parts) != 4 or parts[0] or not parts[1] or not parts[2] or parts[3] != 'parts':
+            continue
+        model_code = parts[2]
         
         # Skip if we've already seen this model
         if model_code in seen:
             continue
-        seen.add(model_code)
         
-        # Clean up the model name
-        model_name = model_name.strip()
+        # Clean up the model name; separate text nodes (e.g. <span>s) and
+        # collapse the whitespace between them
+        model_name = ' '.join(link.text(separator=' ').split())
         
-        # Only include if it looks like a model (not navigation links)
-        if not model_name or model_name in ['Parts', 'Manuals', 'Home', 'Back']:
+        # Only include if it looks like a model (not navigation links). An
+        # image-only link has no text; a later text link to the model still counts
+        if not model_name or model_name in NAV_LINK_TEXT:
             continue
+        seen.add(model_code)
             
         models.append({
             'code': model_code,
@@ -105,14 +135,17 @@ def parse_models_from_html(html_content):
     
     return models
 
-def fetch_and_cache_manufacturer(mfg):
-    """Fetch and cache models for a single manufacturer"""
-    print(f"\n📦 Processing {mfg['name']} ({mfg['code']})")
-    print(f"   URI: {mfg['uri']}")
+async def fetch_and_cache_manufacturer(session, mfg, cached_at, limiter=None):
+    """Fetch and cache models for a single manufacturer
     
+    cached_at is shared by the whole run rather than stamped per file
+    """
     # Fetch the page
-    print(f"   🔍 Fetching models page...")
-    html_content = fetch_models_via_curl(mfg['uri'])
+    html_content = await fetch_models_page(session, mfg['uri'], limiter)
+    
+    # Report only once the fetch is done, so concurrent output doesn't interleave
+    print(f"\n📦 Processing {mfg['name']} ({mfg['code']})")
+    print(f"   URI: {mfg['uri']}")
     
     if not html_content:
         print(f"   ⚠️ Failed to fetch page")
@@ -122,35 +155,26 @@ def fetch_and_cache_manufacturer(mfg):
     models = parse_models_from_html(html_content)
     
     if not models:
-        print(f"   ⚠️ No models found (might be JavaScript-rendered)")
         # Still save empty cache to avoid re-fetching
-        cache_data = {
-            'manufacturer': {
-                'code': mfg['code'],
-                'name': mfg['name'],
-                'uri': mfg['uri']
-            },
-            'models': [],
-            'cached_at': datetime.now().isoformat(),
-            'source': 'complete_cache_script'
-        }
+        print(f"   ⚠️ No models found (might be JavaScript-rendered)")
     else:
         print(f"   ✅ Found {len(models)} models")
-        cache_data = {
-            'manufacturer': {
-                'code': mfg['code'],
-                'name': mfg['name'],
-                'uri': mfg['uri']
-            },
-            'models': models,
-            'cached_at': datetime.now().isoformat(),
-            'source': 'complete_cache_script'
-        }
-    
-    # Save to cache file
+    
+    cache_data = {
+        'manufacturer': {
+            'code': mfg['code'],
+            'name': mfg['name'],
+            'uri': mfg['uri']
+        },
+        'models': models,
+        'cached_at': cached_at,
+        'source': 'complete_cache_script'
+    }
+    
+    # Save to cache file; encoding and writing run off the event loop so the
+    # other fetches keep going meanwhile
     cache_file = os.path.join(MODELS_CACHE_DIR, f"{mfg['code']}.json")
-    with open(cache_file, 'w') as f:
-        json.dump(cache_data, f, indent=2)
+    await asyncio.to_thread(write_model_cache, cache_file, cache_data)
     
     print(f"   💾 Saved to cache: {cache_file}")
     return True
@@ -167,12 +191,11 @@ def update_cache_timestamp(total_cached, new_cached):
         'cache_completion': f"{(total_cached / 489) * 100:.1f}%"
     }
     
-    with open(timestamp_file, 'w') as f:
-        json.dump(timestamp_data, f, indent=2)
+    write_timestamp(timestamp_file, timestamp_data)
     
     print(f"\n📅 Updated cache timestamp: {timestamp_file}")
 
-def main():
+async def main():
     """Main function to complete the cache"""
     print("=" * 60)
     print("CACHE COMPLETION SCRIPT")
@@ -201,33 +224,35 @@ def main():
     
     # Ask for confirmation
     print(f"\n⚠️ This will fetch models for {len(missing)} manufacturers.")
-    print("   This may take several minutes due to rate limiting.")
+    print(f"   Up to {MAX_CONCURRENT} requests run at once, {REQUESTS_PER_SECOND} started per second.")
     response = input("\nProceed? (y/n): ")
     
     if response.lower() != 'y':
         print("Aborted.")
         return
     
-    # Process each missing manufacturer
+    # Process the missing manufacturers concurrently
     print(f"\n🚀 Starting cache completion...")
-    success_count = 0
-    failed = []
+    limiter = RateLimiter(REQUESTS_PER_SECOND)
+    slots = asyncio.Semaphore(MAX_CONCURRENT)
+    cached_at = datetime.now().isoformat()
+    
+    async def process(mfg):
+        async with slots:
+            await limiter.wait_async()
+            try:
+                return await fetch_and_cache_manufacturer(SESSION, mfg, cached_at, limiter)
+            except Exception as e:
+                print(f"\n   ❌ Error for {mfg['name']}: {e}")
+                return False
     
-    for i, mfg in enumerate(missing, 1):
-        print(f"\n[{i}/{len(missing)}] ", end="")
-        
-        try:
-            if fetch_and_cache_manufacturer(mfg):
-                success_count += 1
-            else:
-                failed.append(mfg)
-        except Exception as e:
-            print(f"   ❌ Error: {e}")
-            failed.append(mfg)
-        
-        # Rate limiting - wait between requests
-        if i < len(missing):
-            time.sleep(1)  # 1 second delay between requests
+    try:
+        results = await asyncio.gather(*(process(mfg) for mfg in missing))
+    finally:
+        await SESSION.aclose()
+    
+    success_count = sum(results)
+    failed = [mfg for mfg, ok in zip(missing, results) if not ok]
     
     # Summary
     print("\n" + "=" * 60)
@@ -256,4 +281,4 @@ def main():
         print(f"   Run this script again to retry failed manufacturers")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
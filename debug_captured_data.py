@@ -11,6 +11,8 @@ import json
 # Add the scraper to the path
 sys.path.append('../API Scraper V2')
 
+MAX_PRINTED_JSON = 2000
+
 # Create a modified version of the scraper that exposes captured data
 class DebuggingExplorer:
     def __init__(self):
@@ -19,6 +21,35 @@ class DebuggingExplorer:
         self.timestamp = str(int(time.time() * 1000))
         self.captured_data = []
     
+    def record(self, url, data):
+        """Keep an API response for analysis and print its shape"""
+        print(f"\n🔍 CAPTURED: {url}")
+        print(f"   Data type: {type(data).__name__}, Length: {len(data) if isinstance(data, list) else 'N/A'}")
+        
+        self.captured_data.append({
+            'url': url,
+            'data': data
+        })
+        
+        # Show sample data structure, capped so huge payloads don't flood the terminal
+        if isinstance(data, list) and len(data) > 0:
+            print(f"   First item: {json.dumps(data[0], indent=2)[:MAX_PRINTED_JSON]}")
+        elif isinstance(data, dict):
+            print(f"   Dict keys: {list(data.keys())}")
+            if len(data) < 5:  # Small dict, show all
+                print(f"   Full data: {json.dumps(data, indent=2)[:MAX_PRINTED_JSON]}")
+    
+    async def fetch_json(self, page, url):
+        """GET a JSON endpoint with the page's cookies, without rendering it"""
+        try:
+            response = await page.request.get(url, timeout=30000)
+            if response.ok:
+                self.record(url, await response.json())
+            else:
+                print(f"   ❌ {url} returned {response.status}")
+        except Exception as e:
+            print(f"   ❌ Error fetching {url}: {e}")
+    
     async def debug_henny_penny_data(self):
         """Debug what data we're actually capturing"""
         from playwright.async_api import async_playwright
@@ -32,7 +63,7 @@ class DebuggingExplorer:
         page = await context.new_page()
         
         try:
-            # Capture network responses
+            # Capture the JSON the models page requests while it renders
             async def capture_api_calls(response):
                 url = response.url
                 if ('application/json' in response.headers.get('content-type', '')):
@@ -42,43 +73,26 @@ class DebuggingExplorer:
                             
                             # Capture ALL relevant data, not just models
                             if any(keyword in url for keyword in ['/part-predictor/', '/models', '/manufacturers', '/api/']):
-                                print(f"\n🔍 CAPTURED: {url}")
-                                print(f"   Data type: {type(data).__name__}, Length: {len(data) if isinstance(data, list) else 'N/A'}")
-                                
-                                self.captured_data.append({
-                                    'url': url,
-                                    'data': data
-                                })
-                                
-                                # Show sample data structure
-                                if isinstance(data, list) and len(data) > 0:
-                                    print(f"   First item: {json.dumps(data[0], indent=2)}")
-                                elif isinstance(data, dict):
-                                    print(f"   Dict keys: {list(data.keys())}")
-                                    if len(data) < 5:  # Small dict, show all
-                                        print(f"   Full data: {json.dumps(data, indent=2)}")
+                                self.record(url, data)
                     except Exception as e:
                         print(f"   ❌ Error parsing: {e}")
             
             page.on('response', capture_api_calls)
             
-            # Navigate to manufacturer endpoint first
-            print("🏭 Fetching manufacturers data...")
             mfg_url = f"{self.base_url}/api/manufacturers/?v={self.timestamp}"
-            await page.goto(mfg_url, timeout=30000)
-            await asyncio.sleep(1)
-            
-            # Navigate to Henny Penny models page
-            print("\n🔧 Fetching Henny Penny models...")
             models_url = f"{self.base_url}/henny-penny/parts?v={self.timestamp}&narrow=#id=mdptabmodels"
+            predictor_url = f"{self.base_url}/part-predictor/PT_CAT1095/models"
+            
+            # Only the models page needs rendering. The two JSON endpoints are
+            # fetched directly once it has loaded, so they carry its cookies
+            print("🏭 Loading Henny Penny models page...")
             await page.goto(models_url, wait_until='domcontentloaded', timeout=30000)
-            await asyncio.sleep(2)
             
-            # Try part-predictor endpoint directly
-            print("\n🎯 Trying part-predictor endpoint...")
-            predictor_url = f"{self.base_url}/part-predictor/PT_CAT1095/models"
-            await page.goto(predictor_url, timeout=30000)
-            await asyncio.sleep(2)
+            print("🏭 Fetching manufacturers data and part-predictor endpoint...")
+            await asyncio.gather(
+                self.fetch_json(page, mfg_url),
+                self.fetch_json(page, predictor_url)
+            )
             
             # Now analyze all captured data
             print(f"\n{'='*60}")
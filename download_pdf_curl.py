@@ -1,18 +1,95 @@
 #!/usr/bin/env python3
 """
-Fast PDF download using curl - replaces slow Playwright approach
-Downloads PDFs directly with curl which bypasses CloudFlare
+Fast PDF download over the shared HTTP/2 client - replaces slow Playwright approach
+Downloads PDFs directly, reusing pooled connections instead of a curl process per file
 """
 
-import subprocess
+import base64
+import hashlib
 import os
 import time
-import hashlib
-import base64
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+import orjson
+
+from cache_io import write_bytes, write_json
+from http_session import CLIENT
+
+BASE_URL = "https://www.partstown.com"
+PDF_MAGIC = b'%PDF'
+
+PDF_HEADERS = {'Accept': 'application/pdf,application/octet-stream,*/*'}
+DOWNLOAD_TIMEOUT = 30
+BATCH_WORKERS = 6
+
+# Downloaded PDFs, keyed by a hash of their URL, with a .json sidecar holding
+# the validators for conditional requests
+PDF_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache', 'pdfs')
+
+def _pdf_cache_paths(url):
+    key = hashlib.sha256(url.encode()).hexdigest()
+    base = os.path.join(PDF_CACHE_DIR, key)
+    return base + '.pdf', base + '.json'
+
+def _is_versioned(url):
+    """Manual URLs carry ?v=<timestamp>; a new revision gets a new URL"""
+    return 'v' in parse_qs(urlsplit(url).query)
+
+def _load_cached_pdf(url):
+    """Returns (validators, content) for a cached URL, or (None, None)"""
+    pdf_path, meta_path = _pdf_cache_paths(url)
+    try:
+        with open(meta_path, 'rb') as f:
+            meta = orjson.loads(f.read())
+        with open(pdf_path, 'rb') as f:
+            content = f.read()
+    except (OSError, orjson.JSONDecodeError):
+        return None, None
+    if len(content) != meta.get('size'):
+        return None, None
+    return meta, content
+
+def _store_pdf(url, resp, content):
+    pdf_path, meta_path = _pdf_cache_paths(url)
+    try:
+        os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+        # The sidecar goes last, so it only ever describes a complete PDF
+        write_bytes(pdf_path, content)
+        write_json(meta_path, {
+            'url': url,
+            'etag': resp.headers.get('ETag'),
+            'last_modified': resp.headers.get('Last-Modified'),
+            'size': len(content),
+            'fetched_at': time.time()
+        })
+    except OSError as e:
+        print(f"⚠️ Could not cache PDF: {e}")
+
+def _read_pdf_body(resp):
+    """
+    Read a streamed response body, or None if it isn't a PDF
+    Only the first chunk is read from a non-PDF (usually an HTML challenge page)
+    """
+    chunks = resp.iter_bytes()
+    head = b''
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= len(PDF_MAGIC):
+            break
+    if not head.startswith(PDF_MAGIC):
+        return None
+    # One join over every chunk, rather than joining the rest and copying again onto head
+    body = [head]
+    body.extend(chunks)
+    return b''.join(body)
 
 def download_pdf_via_curl(manual_url, manufacturer_uri=None, model_code=None):
     """
-    Download PDF using curl - much faster than Playwright
+    Download PDF over the pooled client - much faster than Playwright
+    Versioned manual URLs are served from cache/pdfs without a request; others
+    are revalidated with a conditional GET
     
     Args:
         manual_url: The PDF URL (can be relative or absolute)
@@ -24,125 +101,95 @@ def download_pdf_via_curl(manual_url, manufacturer_uri=None, model_code=None):
     """
     
     # Ensure full URL
-    if manual_url.startswith('/'):
-        full_url = f"https://www.partstown.com{manual_url}"
-    else:
-        full_url = manual_url
-    
-    # Create temp file for download
-    pdf_hash = hashlib.md5(manual_url.encode()).hexdigest()
-    temp_file = f"/tmp/{pdf_hash}_download.pdf"
-    
-    # Build curl command
-    curl_cmd = [
-        'curl',
-        '-s',  # Silent
-        '-L',  # Follow redirects
-        '-H', 'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-        '-H', 'Accept: application/pdf,application/octet-stream,*/*',
-        '-H', 'Accept-Language: en-US,en;q=0.9',
-        '--compressed',
-        '--max-time', '30',
-        '-o', temp_file,  # Output to temp file
-        '-w', '%{http_code}|%{size_download}|%{time_total}',  # Write stats
-    ]
+    full_url = BASE_URL + manual_url if manual_url.startswith('/') else manual_url
+    
+    start_time = time.time()
+    meta, cached_content = _load_cached_pdf(full_url)
+    
+    if cached_content is not None and _is_versioned(full_url):
+        print(f"📦 Using cached PDF ({len(cached_content):,} bytes)")
+        return {
+            'success': True,
+            'content': cached_content,
+            'time': time.time() - start_time
+        }
+    
+    headers = dict(PDF_HEADERS)
+    if meta:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
     
     # Add referer if we have manufacturer/model info
     if manufacturer_uri and model_code:
-        referer = f"https://www.partstown.com/{manufacturer_uri}/{model_code}/parts"
-        curl_cmd.extend(['-H', f'Referer: {referer}'])
+        referer = f"{BASE_URL}/{manufacturer_uri}/{model_code}/parts"
+        headers['Referer'] = referer
         print(f"📥 Downloading PDF with referer: {referer}")
     else:
         print(f"📥 Downloading PDF directly")
     
-    curl_cmd.append(full_url)
-    
-    start_time = time.time()
-    
     try:
-        # Execute curl
-        result = subprocess.run(
-            curl_cmd,
-            capture_output=True,
-            text=True,
-            timeout=35
-        )
-        
-        elapsed = time.time() - start_time
-        
-        if result.returncode == 0:
-            # Parse curl stats
-            stats = result.stdout.strip().split('|')
-            http_code = stats[0] if len(stats) > 0 else '?'
-            size = int(stats[1]) if len(stats) > 1 else 0
-            
-            print(f"   Status: {http_code} | Size: {size:,} bytes | Time: {elapsed:.2f}s")
-            
-            # Read the downloaded file
-            if os.path.exists(temp_file):
-                with open(temp_file, 'rb') as f:
-                    pdf_content = f.read()
-                
-                # Verify it's a PDF
-                if pdf_content[:4] == b'%PDF':
-                    print(f"✅ Successfully downloaded {len(pdf_content):,} bytes in {elapsed:.2f}s")
-                    
-                    # Clean up temp file
-                    os.remove(temp_file)
-                    
-                    return {
-                        'success': True,
-                        'content': pdf_content,
-                        'time': elapsed
-                    }
-                else:
-                    print(f"❌ Downloaded file is not a PDF")
-                    os.remove(temp_file)
-                    return {
-                        'success': False,
-                        'error': 'Downloaded file is not a PDF',
-                        'time': elapsed
-                    }
+        with CLIENT.stream('GET', full_url, headers=headers, timeout=DOWNLOAD_TIMEOUT) as resp:
+            if resp.status_code == 304 and cached_content is not None:
+                pdf_content = None
             else:
-                return {
-                    'success': False,
-                    'error': 'No file downloaded',
-                    'time': elapsed
-                }
-        else:
-            print(f"❌ Curl failed with return code {result.returncode}")
-            if result.stderr:
-                print(f"   Error: {result.stderr}")
-            
-            return {
-                'success': False,
-                'error': f'Curl failed with code {result.returncode}',
-                'time': elapsed
-            }
-            
-    except subprocess.TimeoutExpired:
-        print(f"❌ Download timeout after 35 seconds")
-        # Clean up temp file if it exists
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
-        
+                pdf_content = _read_pdf_body(resp)
+    except httpx.TimeoutException:
+        print(f"❌ Download timeout after {DOWNLOAD_TIMEOUT} seconds")
         return {
             'success': False,
             'error': 'Download timeout',
-            'time': 35.0
+            'time': time.time() - start_time
         }
-        
-    except Exception as e:
+    except httpx.HTTPError as e:
         print(f"❌ Error downloading PDF: {e}")
-        # Clean up temp file if it exists
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
-        
         return {
             'success': False,
             'error': str(e),
             'time': time.time() - start_time
         }
+    
+    elapsed = time.time() - start_time
+    
+    if resp.status_code == 304 and cached_content is not None:
+        print(f"📦 PDF unchanged, using cached copy ({len(cached_content):,} bytes)")
+        return {
+            'success': True,
+            'content': cached_content,
+            'time': elapsed
+        }
+    
+    if pdf_content is None:
+        print(f"   Status: {resp.status_code} | Time: {elapsed:.2f}s")
+        print(f"❌ Downloaded file is not a PDF")
+        return {
+            'success': False,
+            'error': 'Downloaded file is not a PDF',
+            'time': elapsed
+        }
+    
+    print(f"   Status: {resp.status_code} | Size: {len(pdf_content):,} bytes | Time: {elapsed:.2f}s")
+    print(f"✅ Successfully downloaded {len(pdf_content):,} bytes in {elapsed:.2f}s")
+    _store_pdf(full_url, resp, pdf_content)
+    return {
+        'success': True,
+        'content': pdf_content,
+        'time': elapsed
+    }
+
+def download_pdfs_batch(jobs, max_workers=BATCH_WORKERS):
+    """
+    Download several PDFs concurrently over the shared connection pool
+    
+    Args:
+        jobs: Iterable of (manual_url, manufacturer_uri, model_code) tuples
+    
+    Returns:
+        list: download_pdf_via_curl results, in the same order as jobs
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda job: download_pdf_via_curl(*job), jobs))
 
 def download_pdf_as_base64(manual_url, manufacturer_uri=None, model_code=None):
     """
@@ -176,15 +223,14 @@ if __name__ == "__main__":
         }
     ]
     
-    print("Testing PDF downloads with curl:\n")
+    print("Testing PDF downloads:\n")
+    
+    results = download_pdfs_batch(
+        (test['url'], test['manufacturer'], test['model']) for test in test_cases
+    )
     
-    for test in test_cases:
+    for test, result in zip(test_cases, results):
         print(f"Testing {test['manufacturer']}/{test['model']}:")
-        result = download_pdf_via_curl(
-            test['url'],
-            test['manufacturer'],
-            test['model']
-        )
         
         if result['success']:
             print(f"  ✅ Success! Downloaded {len(result['content']):,} bytes")
@@ -1,132 +1,173 @@
 #!/usr/bin/env python3
 """
-Download PDF files using browser automation in subprocess
-Navigates through the page to download PDFs with proper authentication
+Download PDF files using browser automation
+Navigates through a model page once to establish the session, then fetches
+PDFs with the browser's authenticated request context
 """
 
-import subprocess
-import json
-import sys
-import base64
-
-def download_pdf_via_page(manufacturer_uri, model_code, manual_url):
-    """Download PDF by navigating through the model page with authentication"""
-    
-    # Ensure manual URL is complete
-    if manual_url.startswith('/'):
-        manual_url = f"https://www.partstown.com{manual_url}"
-    
-    # Python code to run in subprocess
-    script = f"""
 import asyncio
+import os
+import time
+
+import orjson
 from playwright.async_api import async_playwright
-import json
-import base64
-import sys
-
-async def download():
-    # URL of the model page
-    model_page_url = "https://www.partstown.com/{manufacturer_uri}/{model_code}/parts"
-    manual_url = "{manual_url}"
-    
-    playwright = None
-    browser = None
-    
-    try:
-        playwright = await async_playwright().start()
-        browser = await playwright.chromium.launch(headless=True)
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            accept_downloads=True
-        )
-        page = await context.new_page()
-        
-        # First navigate to the model page to establish session
-        await page.goto(model_page_url, wait_until='networkidle', timeout=60000)
-        await page.wait_for_timeout(1000)
-        
-        # Now download the manual with authentication in place
-        async with page.expect_download() as download_info:
-            # Navigate to the manual URL which should trigger download
-            await page.goto(manual_url, timeout=60000)
-            download = await download_info.value
-            
-            # Read the downloaded file
-            path = await download.path()
-            with open(path, 'rb') as f:
-                pdf_content = f.read()
-            
-            # Output as base64
-            encoded = base64.b64encode(pdf_content).decode('utf-8')
-            print(json.dumps({{"success": True, "data": encoded}}))
-            return
-            
-    except Exception as e:
-        # Try alternative approach - fetch via page.request
+
+from cache_io import write_json
+
+PAGE_POOL_SIZE = 5  # Downloads in flight at once, one browser tab each
+NAVIGATION_TIMEOUT = 60000
+
+# Browser session state saved after a model page visit, so later runs can skip
+# the visit while the clearance cookies are still good. The cookies are
+# site-wide, so one state serves every model
+SESSIONS_DIR = os.path.join(os.path.dirname(__file__), 'cache', 'sessions')
+SESSION_PATH = os.path.join(SESSIONS_DIR, 'partstown.json')
+SESSION_TTL = 3600
+EXPIRED_STATUSES = (403, 503)  # The site's answer once a session has gone stale
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+class PdfDownloader:
+    """Starts Chromium once and shares it across a batch of PDF downloads
+
+    async with PdfDownloader() as downloader:
+        results = await asyncio.gather(*(downloader.download(*job) for job in jobs))
+
+    The first download visits its model page; after that the session cookies
+    live in the shared context and every PDF is fetched directly. A saved
+    session younger than SESSION_TTL stands in for the visit entirely.
+    """
+
+    def __init__(self, pages=PAGE_POOL_SIZE):
+        self.size = pages
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.pages = None
+        self._authenticated = False
+        self._auth_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        self.playwright = await async_playwright().start()
         try:
-            # Navigate to model page first for auth
-            await page.goto(model_page_url, wait_until='networkidle', timeout=60000)
-            await page.wait_for_timeout(1000)
-            
-            # Make authenticated request for the PDF
-            response = await page.request.get(manual_url)
-            
-            if response.ok:
-                pdf_content = await response.body()
-                encoded = base64.b64encode(pdf_content).decode('utf-8')
-                print(json.dumps({{"success": True, "data": encoded}}))
+            self.browser = await self.playwright.chromium.launch(headless=True)
+            self.context = await self.browser.new_context(
+                user_agent=USER_AGENT,
+                accept_downloads=True
+            )
+            # Idle tabs; waiting on the queue caps concurrency at the pool size
+            self.pages = asyncio.Queue()
+            for _ in range(self.size):
+                self.pages.put_nowait(await self.context.new_page())
+        except:
+            await self.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.browser:
+            await self.browser.close()
+            self.browser = None
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
+
+    async def _authenticate(self, page, manufacturer_uri, model_code):
+        """Give the context a session, visiting this model's page if there is none"""
+        if self._authenticated:
+            return
+
+        # Concurrent downloads share one visit
+        async with self._auth_lock:
+            if self._authenticated:
+                return
+
+            state = load_session(SESSION_PATH)
+            if state:
+                await self.context.add_cookies(state['cookies'])
             else:
-                print(json.dumps({{"success": False, "error": f"Status {{response.status}}"}}))
-                
-        except Exception as e2:
-            print(json.dumps({{"success": False, "error": str(e2)}}))
-    
-    finally:
-        if browser:
-            await browser.close()
-        if playwright:
-            await playwright.stop()
-
-asyncio.run(download())
-"""
-    
+                model_page_url = f"https://www.partstown.com/{manufacturer_uri}/{model_code}/parts"
+                await page.goto(model_page_url, wait_until='networkidle', timeout=NAVIGATION_TIMEOUT)
+                await page.wait_for_timeout(1000)
+                os.makedirs(SESSIONS_DIR, exist_ok=True)
+                write_json(SESSION_PATH, await self.context.storage_state())
+
+            self._authenticated = True
+
+    def _invalidate(self):
+        """Forget the session so the next attempt visits a model page again"""
+        self._authenticated = False
+        try:
+            os.remove(SESSION_PATH)
+        except FileNotFoundError:
+            pass
+
+    async def download(self, manufacturer_uri, model_code, manual_url):
+        """Download one PDF; returns {'success', 'content'} or {'success', 'error'}"""
+        # Ensure manual URL is complete
+        if manual_url.startswith('/'):
+            manual_url = f"https://www.partstown.com{manual_url}"
+
+        page = await self.pages.get()
+        try:
+            # A stale session gets one retry with a fresh model page visit
+            for attempt in range(2):
+                await self._authenticate(page, manufacturer_uri, model_code)
+
+                # Make authenticated request for the PDF
+                response = await page.request.get(manual_url, timeout=NAVIGATION_TIMEOUT)
+                if response.ok:
+                    return {'success': True, 'content': await response.body()}
+                if response.status not in EXPIRED_STATUSES:
+                    break
+                self._invalidate()
+
+            return {'success': False, 'error': f"Status {response.status}"}
+
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+        finally:
+            self.pages.put_nowait(page)
+
+def load_session(path):
+    """Saved storage state, or None if missing or older than SESSION_TTL"""
+    try:
+        if time.time() - os.path.getmtime(path) > SESSION_TTL:
+            return None
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+async def download_pdfs(jobs, pages=PAGE_POOL_SIZE):
+    """
+    Download several PDFs concurrently through one browser
+
+    Args:
+        jobs: Iterable of (manufacturer_uri, model_code, manual_url) tuples
+
+    Returns:
+        list: download results, in the same order as jobs
+    """
+    async with PdfDownloader(pages=pages) as downloader:
+        return await asyncio.gather(*(downloader.download(*job) for job in jobs))
+
+def download_pdf_via_page(manufacturer_uri, model_code, manual_url):
+    """Download PDF by navigating through the model page with authentication"""
     try:
-        # Run the script in a subprocess
-        result = subprocess.run(
-            [sys.executable, '-c', script],
-            capture_output=True,
-            text=True,
-            timeout=120
-        )
-        
-        if result.stdout:
-            try:
-                response = json.loads(result.stdout.strip())
-                if response.get('success'):
-                    # Decode the base64 PDF content
-                    pdf_content = base64.b64decode(response['data'])
-                    return {'success': True, 'content': pdf_content}
-                else:
-                    return {'success': False, 'error': response.get('error', 'Unknown error')}
-            except json.JSONDecodeError:
-                return {'success': False, 'error': f'Invalid JSON: {result.stdout}'}
-        else:
-            error = result.stderr if result.stderr else 'No output from subprocess'
-            return {'success': False, 'error': error}
-            
-    except subprocess.TimeoutExpired:
-        return {'success': False, 'error': 'Download timeout'}
+        results = asyncio.run(download_pdfs([(manufacturer_uri, model_code, manual_url)], pages=1))
+        return results[0]
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
 if __name__ == "__main__":
     # Test with Henny Penny 500 SPM manual
     result = download_pdf_via_page(
-        "henny-penny", 
-        "500", 
+        "henny-penny",
+        "500",
         "/modelManual/HEN-PF500_spm.pdf?v=1655476514087"
     )
-    
+
     if result['success']:
         print(f"✅ Downloaded {len(result['content'])} bytes")
         with open('test_manual.pdf', 'wb') as f:
@@ -1,238 +1,318 @@
 #!/usr/bin/env python3
 """
-Fast manual fetching using curl subprocess
+Fast manual fetching over the shared pooled httpx clients, sync or async
 Much faster and simpler than Playwright
 """
 
-import subprocess
+import asyncio
+import atexit
 import json
+import os
+import queue
 import re
+import threading
 import time
-import os
-import tempfile
+from concurrent.futures import Future
 
-def fetch_manuals_via_curl(manufacturer_uri, model_code):
-    """Fetch manuals using curl command - fast and reliable"""
-    
-    url = f"https://www.partstown.com/{manufacturer_uri}/{model_code}/parts"
+import httpx
+
+from http_cache import disk_cache
+from http_session import CLIENT, SESSION
+
+# Per-request progress lines are only printed with FETCH_MANUALS_VERBOSE=1;
+# outcomes and errors always are
+VERBOSE = os.environ.get('FETCH_MANUALS_VERBOSE') == '1'
+
+FETCH_TIMEOUT = 10
+
+# Responses that mean the plain HTTP fetch was turned away (e.g. a Cloudflare
+# challenge) rather than that the model page doesn't exist. A 429 is left to
+# the caller's rate limiter; a browser would only hit the site harder
+BLOCKED_STATUSES = (403, 503)
+BATCH_CONCURRENCY = 10  # Model pages in flight at once in fetch_manuals_batch
+RECENT_MODELS = 512  # Parsed manual lists kept in memory on top of the disk cache
+
+MANUAL_LINK_PREFIX = b'/modelManual/'
+CLOUDFLARE_PATTERN = re.compile(rb'cloudflare|cf-ray', re.IGNORECASE)
+QUOTE_PATTERN = re.compile(rb'["\']')
+
+def find_manual_links(html):
+    """
+    Yield the path after each /modelManual/ up to the closing quote, for those naming a .pdf
+    Same matches as findall(rb'/modelManual/([^"\']+\.pdf[^"\']*)'), but a single
+    forward pass: an unterminated or non-PDF link can't make it rescan the page.
+    Works on the raw response bytes; only the links themselves are decoded.
+    """
+    pos = html.find(MANUAL_LINK_PREFIX)
+    while pos != -1:
+        start = pos + len(MANUAL_LINK_PREFIX)
+        quote = QUOTE_PATTERN.search(html, start)
+        end = quote.start() if quote else len(html)
+        
+        link = html[start:end]
+        if link.find(b'.pdf', 1) != -1:
+            yield link.decode('utf-8', 'replace')
+        
+        # Any prefix before the quote belongs to this same link
+        pos = html.find(MANUAL_LINK_PREFIX, end)
+
+# Filename suffix -> (type, title), e.g. HEN-PF500_spm.pdf is a Service & Parts Manual
+MANUAL_TYPES = {
+    'spm': ('spm', 'Service & Parts Manual'),
+    'iom': ('iom', 'Installation & Operation Manual'),
+    'pm': ('pm', 'Parts Manual'),
+    'wd': ('wd', 'Wiring Diagrams'),
+    'sm': ('sm', 'Service Manual'),
+    'qrg': ('qrg', 'Quick Reference Guide'),
+    'ts': ('ts', 'Tech Sheet'),
+}
+DEFAULT_MANUAL_TYPE = ('manual', 'Manual')
+
+def manual_suffix(path):
+    """'HEN-PF500_spm.pdf?v=1' -> 'spm'; '' when the filename has no _suffix"""
+    filename = path.split('?', 1)[0]
+    _, underscore, suffix = filename.rpartition('_')
+    return suffix.split('.', 1)[0].lower() if underscore else ''
+
+def debug(message):
+    if VERBOSE:
+        print(message, flush=True)
+
+def manual_for_link(link):
+    """Manual dict for one /modelManual/ link, typed by its filename suffix"""
+    manual_type, title = MANUAL_TYPES.get(manual_suffix(link), DEFAULT_MANUAL_TYPE)
+    return {
+        'type': manual_type,
+        'title': title,
+        'link': link,
+        'text': title
+    }
+
+def parse_manuals(html):
+    """Extract manual links from a model parts page, given as response bytes"""
+    # Remove duplicates as links stream out, keeping first-seen order
+    matches = dict.fromkeys(find_manual_links(html))
+    debug(f"🔎 Found {len(matches)} unique manual links in HTML")
     
-    # Always use curl - it works locally and should work on Railway too
-    # Removed Playwright fallback due to library issues on Railway
-    print(f"🔍 Using fast curl method for all environments", flush=True)
+    return [manual_for_link(f"/modelManual/{match}") for match in matches]
+
+@disk_cache(key=lambda session, manufacturer_uri, model_code, limiter=None: f"https://www.partstown.com/{manufacturer_uri}/{model_code}/parts", memory=RECENT_MODELS)
+async def fetch_manuals(session, manufacturer_uri, model_code, limiter=None):
+    """Fetch manuals over a shared httpx.AsyncClient (see http_session.SESSION)
     
-    # Create a unique cookie file for this request
-    cookie_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt')
-    cookie_path = cookie_file.name
-    cookie_file.close()
+    Each response is reported to limiter, if given, so a 429 slows the batch down.
+    Returns None when the page couldn't be fetched, so callers can tell a failed
+    request from a model that has no manuals ([]).
+    """
     
-    # Simplified curl command that actually works
-    curl_cmd = [
-        'curl',
-        '-s',  # Silent mode
-        '-H', 'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        '-H', 'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        '-H', 'Accept-Language: en-US,en;q=0.5',
-        '--max-time', '10',  # 10 second timeout
-        '-L',  # Follow redirects
-        url
-    ]
+    url = f"https://www.partstown.com/{manufacturer_uri}/{model_code}/parts"
     
     try:
         start_time = time.time()
-        print(f"🔍 Executing curl command: {' '.join(curl_cmd)}", flush=True)
+        resp = await session.get(url)
+        elapsed = time.time() - start_time
+        if limiter:
+            limiter.observe(resp)
         
-        # Execute curl
-        result = subprocess.run(
-            curl_cmd,
-            capture_output=True,
-            text=True,
-            timeout=15
-        )
+        if resp.status_code != 200:
+            print(f"❌ HTTP {resp.status_code} for {manufacturer_uri}/{model_code}", flush=True)
+            if resp.status_code in BLOCKED_STATUSES:
+                # Sync Playwright, so keep it off the event loop
+                return await asyncio.to_thread(fetch_manuals_via_playwright, manufacturer_uri, model_code)
+            # Only a missing page means there are no manuals to find
+            return [] if resp.status_code == 404 else None
         
+        # Parse off the event loop so other responses in a batch keep arriving
+        manuals = await asyncio.to_thread(parse_manuals, resp.content)
+        print(f"✅ Found {len(manuals)} manuals in {elapsed:.2f}s", flush=True)
+        return manuals
+        
+    except httpx.HTTPError as e:
+        print(f"❌ Request failed for {manufacturer_uri}/{model_code}: {e}", flush=True)
+        return None
+
+def warn_if_error_page(html):
+    """Say why a model page might have come back without manuals"""
+    if CLOUDFLARE_PATTERN.search(html):
+        print(f"⚠️ CloudFlare detected in response", flush=True)
+    if b"<title>404" in html or b"404 Not Found" in html:
+        print(f"⚠️ 404 error page detected", flush=True)
+    if len(html) < 10000:
+        # Small page might be an error or challenge
+        print(f"⚠️ Suspiciously small HTML response: {len(html)} bytes", flush=True)
+        # Print first 500 chars to debug
+        debug(f"📝 First 500 chars: {html[:500].decode('utf-8', 'replace')}")
+
+@disk_cache(key=lambda manufacturer_uri, model_code: f"https://www.partstown.com/{manufacturer_uri}/{model_code}/parts", memory=RECENT_MODELS)
+def fetch_manuals_via_curl(manufacturer_uri, model_code):
+    """Fetch manuals over the shared pooled client (see http_session.CLIENT)
+    
+    Kept under its old name for the servers; connections and cookies persist
+    between calls instead of starting a curl process each time. If the site
+    blocks or fails the request, the Playwright fallback gets one try.
+    """
+    
+    url = f"https://www.partstown.com/{manufacturer_uri}/{model_code}/parts"
+    
+    try:
+        start_time = time.time()
+        debug(f"🔍 Fetching {url}")
+        resp = CLIENT.get(url, timeout=FETCH_TIMEOUT)
         elapsed = time.time() - start_time
-        print(f"📊 Curl returned code {result.returncode} in {elapsed:.2f}s", flush=True)
+        debug(f"📊 HTTP {resp.status_code} in {elapsed:.2f}s")
         
-        if result.returncode == 0 and result.stdout:
-            print(f"📄 Got {len(result.stdout)} bytes of HTML", flush=True)
-            
-            # Check if we got a CloudFlare challenge or error page
-            if "cloudflare" in result.stdout.lower() or "cf-ray" in result.stdout.lower():
-                print(f"⚠️ CloudFlare detected in response", flush=True)
-            if "<title>404" in result.stdout or "404 Not Found" in result.stdout:
-                print(f"⚠️ 404 error page detected", flush=True)
-            if len(result.stdout) < 10000:
-                # Small page might be an error or challenge
-                print(f"⚠️ Suspiciously small HTML response: {len(result.stdout)} bytes", flush=True)
-                # Print first 500 chars to debug
-                print(f"📝 First 500 chars: {result.stdout[:500]}", flush=True)
-            
-            # Extract manual links from HTML
-            manual_pattern = r'/modelManual/([^"\']+\.pdf[^"\']*)'
-            matches = re.findall(manual_pattern, result.stdout)
-            print(f"🔎 Found {len(matches)} manual links in HTML", flush=True)
-            
-            # Remove duplicates and parse
-            seen = set()
-            manuals = []
-            
-            for match in matches:
-                if match not in seen:
-                    seen.add(match)
-                    
-                    # Full path
-                    full_path = f"/modelManual/{match}"
-                    
-                    # Determine manual type from filename
-                    if '_spm.' in match:
-                        manual_type = 'spm'
-                        title = 'Service & Parts Manual'
-                    elif '_iom.' in match:
-                        manual_type = 'iom'
-                        title = 'Installation & Operation Manual'
-                    elif '_pm.' in match:
-                        manual_type = 'pm'
-                        title = 'Parts Manual'
-                    elif '_wd.' in match:
-                        manual_type = 'wd'
-                        title = 'Wiring Diagrams'
-                    elif '_sm.' in match:
-                        manual_type = 'sm'
-                        title = 'Service Manual'
-                    elif '_qrg.' in match:
-                        manual_type = 'qrg'
-                        title = 'Quick Reference Guide'
-                    elif '_ts.' in match:
-                        manual_type = 'ts'
-                        title = 'Tech Sheet'
-                    else:
-                        manual_type = 'manual'
-                        title = 'Manual'
-                    
-                    manuals.append({
-                        'type': manual_type,
-                        'title': title,
-                        'link': full_path,
-                        'text': title
-                    })
-            
-            print(f"✅ Found {len(manuals)} manuals in {elapsed:.2f}s via curl", flush=True)
-            # Clean up cookie file
-            try:
-                os.unlink(cookie_path)
-            except:
-                pass
-            return manuals
-            
-        else:
-            print(f"❌ Curl failed with return code {result.returncode}", flush=True)
-            if result.stderr:
-                print(f"   Error: {result.stderr}", flush=True)
-            # Clean up cookie file
-            try:
-                os.unlink(cookie_path)
-            except:
-                pass
+        if resp.status_code != 200:
+            print(f"❌ HTTP {resp.status_code} for {manufacturer_uri}/{model_code}", flush=True)
+            if resp.status_code in BLOCKED_STATUSES:
+                return fetch_manuals_via_playwright(manufacturer_uri, model_code)
             return []
-            
-    except subprocess.TimeoutExpired:
-        print(f"❌ Curl timeout for {manufacturer_uri}/{model_code}", flush=True)
-        # Clean up cookie file
+        
+        html = resp.content
+        debug(f"📄 Got {len(html)} bytes of HTML")
+        
+        # Extract manual links from HTML
+        manuals = parse_manuals(html)
+        
+        # Only a page without manuals is worth checking for a challenge or error page
+        if not manuals:
+            warn_if_error_page(html)
+        
+        print(f"✅ Found {len(manuals)} manuals in {elapsed:.2f}s", flush=True)
+        return manuals
+        
+    except httpx.TimeoutException:
+        print(f"❌ Timeout for {manufacturer_uri}/{model_code}", flush=True)
+    except httpx.HTTPError as e:
+        print(f"❌ Request failed for {manufacturer_uri}/{model_code}: {e}", flush=True)
+    
+    # Only reached when the fast path failed outright
+    return fetch_manuals_via_playwright(manufacturer_uri, model_code)
+
+async def fetch_manuals_batch(session, pairs, concurrency=BATCH_CONCURRENCY):
+    """
+    Fetch manuals for many models at once over a shared httpx.AsyncClient
+    
+    Args:
+        pairs: Iterable of (manufacturer_uri, model_code) tuples
+    
+    Returns:
+        dict: {(manufacturer_uri, model_code): manuals}, None for failed fetches
+    """
+    pairs = list(pairs)
+    slots = asyncio.Semaphore(concurrency)
+    
+    async def fetch_one(manufacturer_uri, model_code):
+        async with slots:
+            return await fetch_manuals(session, manufacturer_uri, model_code)
+    
+    results = await asyncio.gather(*(fetch_one(*pair) for pair in pairs))
+    return dict(zip(pairs, results))
+
+# Sync Playwright objects only work on the thread that started them, and
+# server_cached calls in from Flask's request threads, so a single daemon
+# thread owns the shared browser and runs every fallback fetch in turn
+_pw_state = {'play': None, 'browser': None, 'context': None}
+_pw_jobs = queue.Queue()
+_pw_thread = None
+_pw_thread_lock = threading.Lock()
+
+# Only the anchor tags matter, so the fallback never downloads these
+BLOCKED_RESOURCE_TYPES = frozenset(('image', 'stylesheet', 'font', 'media'))
+
+def _playwright_worker():
+    while True:
+        func, args, future = _pw_jobs.get()
         try:
-            os.unlink(cookie_path)
-        except:
-            pass
-        return []
-    except Exception as e:
-        print(f"❌ Error running curl: {e}", flush=True)
-        import traceback
-        traceback.print_exc()
-        # Clean up cookie file
+            future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+
+def _run_on_playwright_thread(func, *args):
+    """Run func on the browser-owning thread and wait for its result"""
+    global _pw_thread
+    with _pw_thread_lock:
+        if _pw_thread is None:
+            _pw_thread = threading.Thread(target=_playwright_worker, name='playwright', daemon=True)
+            _pw_thread.start()
+            atexit.register(_run_on_playwright_thread, _close_browser)
+    
+    future = Future()
+    _pw_jobs.put((func, args, future))
+    return future.result()
+
+def _browser_context():
+    """The shared browser context, launching Chromium on first use"""
+    if _pw_state['context'] is None:
+        from playwright.sync_api import sync_playwright
+        
+        if _pw_state['play'] is None:
+            _pw_state['play'] = sync_playwright().start()
+        if _pw_state['browser'] is None:
+            _pw_state['browser'] = _pw_state['play'].chromium.launch(
+                headless=True,
+                args=['--no-sandbox', '--disable-setuid-sandbox']
+            )
+        
+        # Create context with browser-like settings
+        _pw_state['context'] = _pw_state['browser'].new_context(
+            viewport={'width': 1920, 'height': 1080},
+            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        )
+        _pw_state['context'].route('**/*', _block_assets)
+    return _pw_state['context']
+
+def _block_assets(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        route.abort()
+    else:
+        route.continue_()
+
+def _close_browser():
+    if _pw_state['browser']:
+        _pw_state['browser'].close()
+    if _pw_state['play']:
+        _pw_state['play'].stop()
+    _pw_state.update(play=None, browser=None, context=None)
+
+def _scrape_manuals(url):
+    """Load one model page in a fresh tab of the shared context"""
+    page = _browser_context().new_page()
+    try:
+        # Navigate to the page with more lenient settings
+        print(f"📍 Navigating to {url}", flush=True)
+        page.goto(url, wait_until='domcontentloaded', timeout=30000)
+        
+        # Wait for either manual links or a sign the page loaded
         try:
-            os.unlink(cookie_path)
+            # Wait for manual links to appear (max 5 seconds)
+            page.wait_for_selector('a[href*="/modelManual/"]', timeout=5000)
+            print(f"✅ Found manual links on page", flush=True)
         except:
-            pass
-        return []
+            # If no manuals, at least wait for the page to stabilize
+            print(f"⏳ No manual links found immediately, waiting for page to stabilize", flush=True)
+            page.wait_for_timeout(3000)
+        
+        # Every link's href in one round trip instead of one call per link
+        hrefs = page.eval_on_selector_all(
+            'a[href*="/modelManual/"]',
+            'els => els.map(e => e.getAttribute("href"))'
+        )
+        
+        # Typed the same way as parse_manuals, so a cached result doesn't
+        # depend on which path fetched it
+        manuals = [manual_for_link(href) for href in dict.fromkeys(hrefs) if href]
+    finally:
+        page.close()
+    
+    return manuals
 
 def fetch_manuals_via_playwright(manufacturer_uri, model_code):
     """Fallback to Playwright for environments where curl is blocked"""
     try:
-        from playwright.sync_api import sync_playwright
-        
         url = f"https://www.partstown.com/{manufacturer_uri}/{model_code}/parts"
         print(f"🎭 Using Playwright to fetch {url}", flush=True)
         
-        manuals = []
-        
-        with sync_playwright() as p:
-            # Launch browser
-            browser = p.chromium.launch(
-                headless=True,
-                args=['--no-sandbox', '--disable-setuid-sandbox']
-            )
-            
-            # Create context with browser-like settings
-            context = browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
-            
-            page = context.new_page()
-            
-            # Navigate to the page with more lenient settings
-            print(f"📍 Navigating to {url}", flush=True)
-            page.goto(url, wait_until='domcontentloaded', timeout=30000)
-            
-            # Wait for either manual links or a sign the page loaded
-            try:
-                # Wait for manual links to appear (max 5 seconds)
-                page.wait_for_selector('a[href*="/modelManual/"]', timeout=5000)
-                print(f"✅ Found manual links on page", flush=True)
-            except:
-                # If no manuals, at least wait for the page to stabilize
-                print(f"⏳ No manual links found immediately, waiting for page to stabilize", flush=True)
-                page.wait_for_timeout(3000)
-            
-            # Get all manual links
-            manual_links = page.locator('a[href*="/modelManual/"]').all()
-            
-            seen = set()
-            for link in manual_links:
-                href = link.get_attribute('href')
-                if href and href not in seen:
-                    seen.add(href)
-                    
-                    # Parse the manual type from URL (case insensitive)
-                    href_lower = href.lower()
-                    if '_spm.' in href_lower or '_sm.' in href_lower:
-                        manual_type = 'sm'
-                        title = 'Service & Parts Manual' if '_spm.' in href_lower else 'Service Manual'
-                    elif '_pm.' in href_lower:
-                        manual_type = 'pm'
-                        title = 'Parts Manual'
-                    elif '_om.' in href_lower or '_iom.' in href_lower:
-                        manual_type = 'om'
-                        title = 'Installation & Operation Manual' if '_iom.' in href_lower else 'Operation Manual'
-                    elif '_im.' in href_lower:
-                        manual_type = 'im'
-                        title = 'Installation Manual'
-                    elif '_qrg.' in href_lower:
-                        manual_type = 'qrg'
-                        title = 'Quick Reference Guide'
-                    elif '_ts.' in href_lower:
-                        manual_type = 'ts'
-                        title = 'Tech Sheet'
-                    else:
-                        manual_type = 'manual'
-                        title = 'Manual'
-                    
-                    manuals.append({
-                        'type': manual_type,
-                        'title': title,
-                        'link': href,
-                        'text': title
-                    })
-            
-            browser.close()
+        manuals = _run_on_playwright_thread(_scrape_manuals, url)
             
         print(f"✅ Found {len(manuals)} manuals via Playwright", flush=True)
         return manuals
@@ -258,23 +338,28 @@ def test_performance():
     print("CURL-BASED MANUAL FETCHING TEST")
     print("="*60)
     
-    total_time = 0
     success_count = 0
     
-    for manufacturer, model in test_cases:
+    async def run_batch():
+        try:
+            return await fetch_manuals_batch(SESSION, test_cases)
+        finally:
+            await SESSION.aclose()
+    
+    # All test cases are fetched concurrently, so time the batch as a whole
+    start = time.time()
+    results = asyncio.run(run_batch())
+    total_time = time.time() - start
+    
+    for (manufacturer, model), manuals in results.items():
         print(f"\nTesting {manufacturer}/{model}:")
-        start = time.time()
-        
-        manuals = fetch_manuals_via_curl(manufacturer, model)
-        
-        elapsed = time.time() - start
-        total_time += elapsed
         
         if manuals:
             success_count += 1
-            print(f"  Time: {elapsed:.2f}s")
             for manual in manuals:
                 print(f"  - {manual['title']}: {manual['link']}")
+        elif manuals is None:
+            print(f"  Fetch failed")
         else:
             print(f"  No manuals found")
     
@@ -282,7 +367,7 @@ def test_performance():
     print("SUMMARY")
     print("="*60)
     print(f"Success rate: {success_count}/{len(test_cases)} ({success_count*100/len(test_cases):.0f}%)")
-    print(f"Average time: {total_time/len(test_cases):.2f}s")
+    print(f"Average time: {total_time/len(test_cases):.2f}s (fetched concurrently)")
     print(f"Total time: {total_time:.2f}s")
     print("\nCompared to Playwright (~5s per request):")
     print(f"Speed improvement: {5/(total_time/len(test_cases)):.1f}x faster")
@@ -5,74 +5,50 @@ Since manuals weren't cached, this fetches them on-demand
 """
 
 import asyncio
+import atexit
 import sys
 import os
 import json
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'API Scraper V2'))
 from interactive_scraper import PartsTownExplorer
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 
-async def fetch_manuals_for_model(manufacturer_uri, model_code):
-    """Fetch manuals for a specific model by scraping its page"""
-    from playwright.async_api import async_playwright
+from manual_types import manual_entry
+from manuals_daemon import LINK_PAIRS_JS, MANUAL_LINK_SELECTOR, block_assets
+
+MAX_CONCURRENCY = 8  # Model pages open at once in fetch_manuals_batch
+MANUAL_LINK_WAIT = 8000  # ms to wait for a manual link before deciding a page has none
+
+# Browser kept between calls made on the same event loop, so repeat lookups
+# (e.g. from a server handler) only open a tab. It is closed when that loop
+# shuts down (see _close_with_loop) or by close_shared_browser()
+_shared = {'loop': None, 'lock': None, 'playwright': None, 'browser': None, 'context': None, 'keeper': None}
+
+async def _fetch_one(context, manufacturer_uri, model_code):
+    """Scrape one model's parts page in a new tab of the shared context"""
     
     # Create URL for the model's parts page
     model_url = f"https://www.partstown.com/{manufacturer_uri}/{model_code}/parts"
     print(f"🔍 Fetching manuals from: {model_url}")
     
-    playwright = None
-    browser = None
-    
+    page = None
     try:
-        playwright = await async_playwright().start()
-        browser = await playwright.chromium.launch(headless=True)
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            viewport={'width': 1920, 'height': 1080}
-        )
         page = await context.new_page()
         
         # Navigate to model page
-        response = await page.goto(model_url, wait_until='domcontentloaded', timeout=30000)
+        await page.goto(model_url, wait_until='domcontentloaded', timeout=30000)
         
-        # Wait for page to load
-        await page.wait_for_timeout(2000)
+        # Wait for the manual links to render; a model without manuals waits out MANUAL_LINK_WAIT
+        try:
+            await page.wait_for_selector(MANUAL_LINK_SELECTOR, timeout=MANUAL_LINK_WAIT)
+        except PlaywrightTimeoutError:
+            pass
         
-        # Look for manual links
-        manual_links = await page.query_selector_all('a[href*="/modelManual/"]')
+        # Every link's href and text in one round trip instead of two calls per link
+        manual_links = await page.eval_on_selector_all(MANUAL_LINK_SELECTOR, LINK_PAIRS_JS)
         
-        manuals = []
-        for link in manual_links:
-            href = await link.get_attribute('href')
-            text = await link.text_content()
-            
-            if href:
-                # Extract manual type from filename
-                if '_spm.' in href:
-                    manual_type = 'spm'
-                    title = 'Service & Parts Manual'
-                elif '_iom.' in href:
-                    manual_type = 'iom'
-                    title = 'Installation & Operation Manual'
-                elif '_pm.' in href:
-                    manual_type = 'pm'
-                    title = 'Parts Manual'
-                elif '_wd.' in href:
-                    manual_type = 'wd'
-                    title = 'Wiring Diagrams'
-                elif '_sm.' in href:
-                    manual_type = 'sm'
-                    title = 'Service Manual'
-                else:
-                    manual_type = 'unknown'
-                    title = text.strip() if text else 'Manual'
-                
-                manuals.append({
-                    'type': manual_type,
-                    'title': title,
-                    'link': href,
-                    'text': text.strip() if text else title
-                })
+        manuals = [manual_entry(href, text) for href, text in manual_links if href]
         
         print(f"✅ Found {len(manuals)} manuals")
         return manuals
@@ -82,10 +58,95 @@ async def fetch_manuals_for_model(manufacturer_uri, model_code):
         return []
     
     finally:
-        if browser:
-            await browser.close()
-        if playwright:
-            await playwright.stop()
+        if page:
+            await page.close()
+
+async def _close_with_loop():
+    """Park until asyncio.run() cancels leftover tasks at shutdown, then close the browser"""
+    try:
+        await asyncio.get_running_loop().create_future()
+    finally:
+        await close_shared_browser()
+
+async def _shared_context():
+    """The module's browser context, launched on first use in this event loop"""
+    loop = asyncio.get_running_loop()
+    if _shared['loop'] is not loop:
+        # Playwright objects only work on the loop that made them, and a closed
+        # loop can't shut them down; refuse rather than leak the old browser
+        if _shared['playwright'] is not None:
+            raise RuntimeError("Shared browser is still open on another event loop; "
+                               "await close_shared_browser() before that loop ends")
+        _shared.update(loop=loop, lock=asyncio.Lock())
+    
+    async with _shared['lock']:
+        if _shared['context'] is None:
+            if _shared['playwright'] is None:
+                _shared['playwright'] = await async_playwright().start()
+                _shared['keeper'] = asyncio.create_task(_close_with_loop())
+            if _shared['browser'] is None:
+                browser = await _shared['playwright'].chromium.launch(headless=True)
+                # Relaunch on the next call if the browser goes away
+                browser.on('disconnected', lambda _: _shared.update(browser=None, context=None))
+                _shared['browser'] = browser
+            
+            context = await _shared['browser'].new_context(
+                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+                viewport={'width': 1920, 'height': 1080}
+            )
+            await context.route('**/*', block_assets)
+            _shared['context'] = context
+    
+    return _shared['context']
+
+async def close_shared_browser():
+    """Shut down the shared browser; the next fetch launches a new one"""
+    browser, playwright, keeper = _shared['browser'], _shared['playwright'], _shared['keeper']
+    _shared.update(playwright=None, browser=None, context=None, keeper=None)
+    if keeper and keeper is not asyncio.current_task():
+        keeper.cancel()
+    if browser:
+        await browser.close()
+    if playwright:
+        await playwright.stop()
+
+def _close_at_exit():
+    # Only possible while the owning loop is still open and idle
+    loop = _shared['loop']
+    if _shared['playwright'] and loop and not loop.is_closed() and not loop.is_running():
+        loop.run_until_complete(close_shared_browser())
+
+atexit.register(_close_at_exit)
+
+async def fetch_manuals_batch(jobs, max_concurrency=MAX_CONCURRENCY):
+    """
+    Scrape several models' manuals at once through the shared browser
+    
+    Args:
+        jobs: Iterable of (manufacturer_uri, model_code) tuples
+    
+    Returns:
+        dict: {(manufacturer_uri, model_code): manuals}
+    """
+    jobs = list(jobs)
+    slots = asyncio.Semaphore(max_concurrency)
+    context = await _shared_context()
+    
+    async def bounded(manufacturer_uri, model_code):
+        async with slots:
+            return await _fetch_one(context, manufacturer_uri, model_code)
+    
+    results = await asyncio.gather(*(bounded(*job) for job in jobs))
+    return dict(zip(jobs, results))
+
+async def fetch_manuals_for_model(manufacturer_uri, model_code):
+    """Fetch manuals for a specific model by scraping its page"""
+    try:
+        results = await fetch_manuals_batch([(manufacturer_uri, model_code)])
+        return results[(manufacturer_uri, model_code)]
+    except Exception as e:
+        print(f"❌ Error fetching manuals: {e}")
+        return []
 
 async def main():
     # Test with APW Wyott AT-10
@@ -94,6 +155,7 @@ async def main():
     
     manuals = await fetch_manuals_for_model(manufacturer_uri, model_code)
     print(json.dumps(manuals, indent=2))
+    await close_shared_browser()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
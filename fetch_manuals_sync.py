@@ -1,12 +1,98 @@
 #!/usr/bin/env python3
 """
-Synchronous manual fetcher using requests and BeautifulSoup
-Simpler approach without browser automation
+Synchronous manual fetcher using plain HTTP and selectolax
+Simpler approach without browser automation; pages that come back without
+manual links (JavaScript-rendered) fall back to the Playwright worker.
+Parsed results are kept in cache/manual_pages and revalidated with
+conditional GETs.
 """
 
-import requests
-from bs4 import BeautifulSoup
-import re
+import asyncio
+import hashlib
+import os
+import time
+
+import orjson
+from selectolax.lexbor import LexborHTMLParser
+
+from cache_io import write_json
+from fetch_manuals_subprocess import fetch_manuals_for_model
+from http_session import CLIENT, SESSION
+from manual_types import manual_entry
+
+FETCH_CONCURRENCY = 16  # Model pages in flight at once in fetch_many
+
+# Parsed manual lists keyed by a hash of the model page URL, with the page's
+# validators so unchanged pages are answered by a 304 instead of re-downloaded
+MANUAL_PAGES_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache', 'manual_pages')
+
+def parse_manual_links(html):
+    """Manual dicts for every /modelManual/ link in a page, given as str or bytes"""
+    # Pages rendered client-side carry no manual links at all; a substring scan
+    # settles that without building the DOM
+    marker = b'/modelManual/' if isinstance(html, bytes) else '/modelManual/'
+    if marker not in html:
+        return []
+    
+    tree = LexborHTMLParser(html)
+    
+    # A manual is often linked more than once (thumbnail and title); keep the first
+    manuals = {}
+    for link in tree.css('a[href*="/modelManual/"]'):
+        href = link.attributes.get('href')
+        if href and href not in manuals:
+            manuals[href] = manual_entry(href, ' '.join(link.text(separator=' ').split()))
+    
+    return list(manuals.values())
+
+def _cache_path(url):
+    key = hashlib.sha256(url.encode()).hexdigest()
+    return os.path.join(MANUAL_PAGES_CACHE_DIR, f"{key}.json")
+
+def _load_cached_manuals(url):
+    try:
+        with open(_cache_path(url), 'rb') as f:
+            return orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+def _conditional_headers(cached):
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+    return headers
+
+def _store_manuals(url, response, manuals):
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if not (etag or last_modified):
+        # Nothing to revalidate with next time
+        return
+    try:
+        os.makedirs(MANUAL_PAGES_CACHE_DIR, exist_ok=True)
+        write_json(_cache_path(url), {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'manuals': manuals,
+            'fetched_at': time.time()
+        })
+    except OSError as e:
+        print(f"⚠️ Could not cache manuals: {e}")
+
+def _manuals_from_response(url, response, cached):
+    """Manuals for a model page response; a 304 reuses the cached list unparsed"""
+    if response.status_code == 304 and cached:
+        print(f"📦 Page unchanged, using cached manuals")
+        return cached['manuals']
+    
+    response.raise_for_status()
+    manuals = parse_manual_links(response.content)
+    _store_manuals(url, response, manuals)
+    return manuals
 
 def fetch_manuals_simple(manufacturer_uri, model_code):
     """Fetch manuals using simple HTTP request"""
@@ -14,65 +100,68 @@ def fetch_manuals_simple(manufacturer_uri, model_code):
     model_url = f"https://www.partstown.com/{manufacturer_uri}/{model_code}/parts"
     print(f"🔍 Fetching manuals from: {model_url}")
     
+    cached = _load_cached_manuals(model_url)
+    
     try:
-        # Simple HTTP request
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(model_url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        # Parse HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find manual links
-        manual_links = soup.find_all('a', href=re.compile(r'/modelManual/'))
-        
-        manuals = []
-        for link in manual_links:
-            href = link.get('href', '')
-            text = link.get_text(strip=True)
-            
-            if href:
-                # Extract manual type from filename
-                if '_spm.' in href:
-                    manual_type = 'spm'
-                    title = 'Service & Parts Manual'
-                elif '_iom.' in href:
-                    manual_type = 'iom'
-                    title = 'Installation & Operation Manual'
-                elif '_pm.' in href:
-                    manual_type = 'pm'
-                    title = 'Parts Manual'
-                elif '_wd.' in href:
-                    manual_type = 'wd'
-                    title = 'Wiring Diagrams'
-                elif '_sm.' in href:
-                    manual_type = 'sm'
-                    title = 'Service Manual'
-                else:
-                    manual_type = 'unknown'
-                    title = text if text else 'Manual'
-                
-                manuals.append({
-                    'type': manual_type,
-                    'title': title,
-                    'link': href,
-                    'text': text if text else title
-                })
-        
-        print(f"✅ Found {len(manuals)} manuals")
-        return manuals
-        
+        response = CLIENT.get(model_url, headers=_conditional_headers(cached))
+        manuals = _manuals_from_response(model_url, response, cached)
     except Exception as e:
         print(f"❌ Error fetching manuals: {e}")
-        # If simple request fails, return empty list
+        return []
+    
+    if not manuals:
         # The site might require JavaScript rendering
+        print(f"⚠️ No manual links in HTML, trying Playwright")
+        return fetch_manuals_for_model(manufacturer_uri, model_code)
+    
+    print(f"✅ Found {len(manuals)} manuals")
+    return manuals
+
+async def fetch_manuals_async(manufacturer_uri, model_code, session=SESSION):
+    """fetch_manuals_simple over a shared httpx.AsyncClient"""
+    
+    model_url = f"https://www.partstown.com/{manufacturer_uri}/{model_code}/parts"
+    print(f"🔍 Fetching manuals from: {model_url}")
+    
+    cached = _load_cached_manuals(model_url)
+    
+    try:
+        response = await session.get(model_url, headers=_conditional_headers(cached))
+        manuals = _manuals_from_response(model_url, response, cached)
+    except Exception as e:
+        print(f"❌ Error fetching manuals: {e}")
         return []
+    
+    if not manuals:
+        # The Playwright worker is driven synchronously; wait for it off the loop
+        print(f"⚠️ No manual links in HTML, trying Playwright")
+        return await asyncio.to_thread(fetch_manuals_for_model, manufacturer_uri, model_code)
+    
+    print(f"✅ Found {len(manuals)} manuals")
+    return manuals
+
+async def fetch_many(jobs, concurrency=FETCH_CONCURRENCY, session=SESSION):
+    """
+    Fetch manuals for many models at once
+    
+    Args:
+        jobs: Iterable of (manufacturer_uri, model_code) tuples
+    
+    Returns:
+        dict: {(manufacturer_uri, model_code): manuals}
+    """
+    jobs = list(jobs)
+    slots = asyncio.Semaphore(concurrency)
+    
+    async def fetch_one(manufacturer_uri, model_code):
+        async with slots:
+            return await fetch_manuals_async(manufacturer_uri, model_code, session)
+    
+    results = await asyncio.gather(*(fetch_one(*job) for job in jobs))
+    return dict(zip(jobs, results))
 
 if __name__ == "__main__":
     # Test with APW Wyott AT-10
     manuals = fetch_manuals_simple("apw-wyott", "at-10")
     import json
-    print(json.dumps(manuals, indent=2))
\ No newline at end of file
+    print(json.dumps(manuals, indent=2))
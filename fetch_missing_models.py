@@ -4,14 +4,16 @@ Fetch real model data for manufacturers with empty model arrays.
 Uses the actual PartsTown scraper with Playwright to get JavaScript-rendered content.
 """
 
-import json
 import os
 import sys
 import time
 import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 
+import orjson
+
 # Add the scraper path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'API Scraper V2'))
 
@@ -23,26 +25,31 @@ except ImportError:
     print("   Make sure the scraper is available in the parent directory")
     sys.exit(1)
 
+from cache_io import write_model_cache
+from model_cache import cached_files, empty_codes
+from rate_limiter import RateLimiter
+
 # Cache directories
 CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache')
 MODELS_CACHE_DIR = os.path.join(CACHE_DIR, 'models')
 
+# Manufacturers are scraped in parallel, each scraper instance handling one at
+# a time, with request starts spaced out globally
+SCRAPER_WORKERS = 4
+REQUESTS_PER_SECOND = 5
+
 def get_empty_manufacturers():
     """Get list of manufacturers with empty model arrays"""
     # Load manufacturers list
-    with open(os.path.join(CACHE_DIR, 'manufacturers.json'), 'r') as f:
-        manufacturers = json.load(f)
+    with open(os.path.join(CACHE_DIR, 'manufacturers.json'), 'rb') as f:
+        manufacturers = orjson.loads(f.read())
     
-    empty = []
-    for mfg in manufacturers:
-        cache_file = os.path.join(MODELS_CACHE_DIR, f"{mfg['code']}.json")
-        if os.path.exists(cache_file):
-            with open(cache_file, 'r') as f:
-                cache_data = json.load(f)
-                if len(cache_data.get('models', [])) == 0:
-                    empty.append(mfg)
+    cached = cached_files(MODELS_CACHE_DIR)
     
-    return empty
+    # Only manufacturers that have a cache file can have an empty one
+    empty = empty_codes(cached[mfg['code']] for mfg in manufacturers if mfg['code'] in cached)
+    
+    return [mfg for mfg in manufacturers if mfg['code'] in empty]
 
 async def fetch_models_with_scraper(scraper, manufacturer):
     """Fetch models for a manufacturer using the actual scraper"""
@@ -78,11 +85,72 @@ async def update_manufacturer_cache(manufacturer, models):
         'source': 'fetch_missing_models_script'
     }
     
-    with open(cache_file, 'w') as f:
-        json.dump(cache_data, f, indent=2)
+    # Serialize and write off the event loop; other manufacturers are still being scraped
+    await asyncio.to_thread(write_model_cache, cache_file, cache_data)
     
     print(f"   💾 Updated cache: {cache_file}")
 
+class ScraperPool:
+    """Pre-warmed InteractiveScraper instances, each lent to one job at a time
+
+    async with ScraperPool(4) as pool:
+        async with pool.acquire() as scraper:
+            models = await scraper.get_models(uri)
+    """
+
+    def __init__(self, size=SCRAPER_WORKERS):
+        self.size = size
+        self.idle = asyncio.Queue()
+        self.started = []
+
+    async def __aenter__(self):
+        try:
+            for _ in range(self.size):
+                scraper = InteractiveScraper()
+                self.started.append(scraper)
+                await scraper.init()
+                self.idle.put_nowait(scraper)
+        except:
+            await self.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        print("\n🧹 Closing scrapers...")
+        for scraper in self.started:
+            await scraper.close()
+        self.started = []
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Wait for an idle scraper and put it back when the job is done"""
+        scraper = await self.idle.get()
+        try:
+            yield scraper
+        finally:
+            self.idle.put_nowait(scraper)
+
+async def process_manufacturer(pool, limiter, mfg, label):
+    """Fetch and cache one manufacturer's models on the next free scraper; True on success"""
+    async with pool.acquire() as scraper:
+        try:
+            await limiter.wait_async()
+            print(f"\n{label} Processing {mfg['name']} ({mfg['code']})")
+            
+            # Fetch models
+            models = await fetch_models_with_scraper(scraper, mfg)
+            
+            if models:
+                # Update cache
+                await update_manufacturer_cache(mfg, models)
+                return True
+            print(f"   ⚠️ No models to update")
+            
+        except Exception as e:
+            print(f"   ❌ Failed: {e}")
+    
+    return False
+
 async def main():
     """Main function to fetch missing model data"""
     print("=" * 60)
@@ -109,7 +177,7 @@ async def main():
     # Ask for confirmation
     print(f"\n⚠️ This will fetch real model data for {len(empty)} manufacturers.")
     print("   This uses Playwright and may take 30-60 seconds per manufacturer.")
-    print(f"   Estimated time: {len(empty) * 45 / 60:.1f} minutes")
+    print(f"   Estimated time: {len(empty) * 45 / 60 / SCRAPER_WORKERS:.1f} minutes ({SCRAPER_WORKERS} at a time)")
     
     # For testing, just do the first 5
     print("\n📝 For testing, we'll just do the first 5 manufacturers.")
@@ -119,40 +187,18 @@ async def main():
         print("Aborted.")
         return
     
-    # Initialize scraper
-    print("\n🚀 Initializing scraper...")
-    scraper = InteractiveScraper()
-    await scraper.init()
-    
     # Process first 5 manufacturers
     test_batch = empty[:5]
-    success_count = 0
     
-    for i, mfg in enumerate(test_batch, 1):
-        print(f"\n[{i}/{len(test_batch)}] Processing {mfg['name']} ({mfg['code']})")
-        
-        try:
-            # Fetch models
-            models = await fetch_models_with_scraper(scraper, mfg)
-            
-            if models:
-                # Update cache
-                await update_manufacturer_cache(mfg, models)
-                success_count += 1
-            else:
-                print(f"   ⚠️ No models to update")
-                
-        except Exception as e:
-            print(f"   ❌ Failed: {e}")
-        
-        # Rate limiting
-        if i < len(test_batch):
-            print("   ⏳ Waiting 2 seconds...")
-            await asyncio.sleep(2)
-    
-    # Cleanup
-    print("\n🧹 Closing scraper...")
-    await scraper.close()
+    # Initialize scrapers
+    print("\n🚀 Initializing scrapers...")
+    async with ScraperPool(min(SCRAPER_WORKERS, len(test_batch))) as pool:
+        limiter = RateLimiter(REQUESTS_PER_SECOND)
+        results = await asyncio.gather(*(
+            process_manufacturer(pool, limiter, mfg, f"[{i}/{len(test_batch)}]")
+            for i, mfg in enumerate(test_batch, 1)
+        ))
+        success_count = sum(results)
     
     # Summary
     print("\n" + "=" * 60)
@@ -1,170 +1,167 @@
 #!/usr/bin/env python3
 """
-Fetch models for manufacturers using curl - the same method that works for manuals.
+Fetch models for manufacturers with plain HTTP requests - the same method that works for manuals.
 This bypasses CloudFlare and JavaScript rendering issues.
 """
 
+import functools
+import itertools
 import json
 import os
-import subprocess
 import time
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+import httpx
+import orjson
+
+from cache_io import write_model_cache, write_timestamp
+from http_session import CLIENT
+from model_cache import cached_files, empty_codes
+from rate_limiter import RateLimiter
+
 # Cache directories
 CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache')
 MODELS_CACHE_DIR = os.path.join(CACHE_DIR, 'models')
 
+# Pages are fetched in parallel over the shared HTTP/2 client, with request
+# starts spaced out globally
+FETCH_WORKERS = 10
+REQUESTS_PER_SECOND = 4
+
+PAGE_TIMEOUT = 30
+API_TIMEOUT = 10
+
+# Model data besides the direct links: data attributes, then JavaScript model data.
+# Every gap is a negated class; the one inside a JS object is also length-capped,
+# so a modelCode with no modelName nearby can't rescan the rest of the object
+MODEL_DATA_PATTERNS = (
+    r'data-model-code="([^"]+)"[^>]*data-model-name="([^"]+)"',
+    r'"modelCode":\s*"([^"]+)"[^}]{0,200}"modelName":\s*"([^"]+)"',
+)
+MODEL_API_PATTERN = re.compile(r'"/([^"]*models[^"]*)"')
+
+# Link text that belongs to site navigation rather than a model
+NAV_LINK_TEXT = frozenset({'Parts', 'Manuals', 'Home', 'Back', ''})
+
+@functools.lru_cache(maxsize=512)  # Comfortably more than the ~489 manufacturers
+def model_pattern(manufacturer_uri):
+    """Direct model links like /manufacturer/model-code/parts or either form of
+    model data, as one alternation so the page is scanned once; each match sets
+    exactly one (code, name) group pair"""
+    link = rf'href="/{re.escape(manufacturer_uri)}/([^/"]+)/parts"[^>]*>([^<]+)</a>'
+    return re.compile('|'.join((link, *MODEL_DATA_PATTERNS)), re.IGNORECASE)
+
 def get_manufacturers_without_models():
     """Get manufacturers that have empty model arrays or no cache file"""
-    with open(os.path.join(CACHE_DIR, 'manufacturers.json'), 'r') as f:
-        manufacturers = json.load(f)
+    with open(os.path.join(CACHE_DIR, 'manufacturers.json'), 'rb') as f:
+        manufacturers = orjson.loads(f.read())
     
-    need_models = []
-    for mfg in manufacturers:
-        cache_file = os.path.join(MODELS_CACHE_DIR, f"{mfg['code']}.json")
-        
-        # Check if file doesn't exist or has empty models
-        if not os.path.exists(cache_file):
-            need_models.append(mfg)
-        else:
-            with open(cache_file, 'r') as f:
-                data = json.load(f)
-                if len(data.get('models', [])) == 0:
-                    need_models.append(mfg)
+    cached = cached_files(MODELS_CACHE_DIR)
+    
+    # Cached manufacturers still need models if their file is empty
+    empty = empty_codes(cached[mfg['code']] for mfg in manufacturers if mfg['code'] in cached)
+    
+    # Keep manufacturers.json order
+    return [mfg for mfg in manufacturers if mfg['code'] not in cached or mfg['code'] in empty]
+
+def models_from_api(data, manufacturer_uri, max_models):
+    """Models from a models API response, either a bare list or {'models': [...]}"""
+    if isinstance(data, dict):
+        data = data.get('models')
+    if not isinstance(data, list):
+        return []
+    
+    models = []
+    for item in itertools.islice(data, max_models):
+        if isinstance(item, dict):
+            code = item.get('code', item.get('modelCode', ''))
+            models.append({
+                'code': code,
+                'name': item.get('name', item.get('modelName', '')),
+                'url': f"/{manufacturer_uri}/{code}/parts"
+            })
     
-    return need_models
+    return models
 
-def fetch_models_via_curl(manufacturer_uri, max_models=50):
+def fetch_models_via_curl(manufacturer_uri, max_models=50, limiter=None, client=CLIENT):
     """
-    Fetch models using curl by scraping the HTML directly.
-    Similar to how we fetch manuals successfully.
+    Fetch models by scraping the HTML directly.
+    Similar to how we fetch manuals successfully; the page and any API probes
+    go over one pooled client, so only the first request pays for a handshake.
+    The page response is reported to limiter so throttling slows every worker.
     """
     
     # First, get the main parts page
     url = f"https://www.partstown.com/{manufacturer_uri}/parts"
     
-    curl_cmd = [
-        'curl',
-        '-s',  # Silent
-        '-L',  # Follow redirects
-        '-H', 'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-        '-H', 'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        '-H', 'Accept-Language: en-US,en;q=0.9',
-        '--compressed',
-        '--max-time', '30',
-        url
-    ]
-    
     try:
-        result = subprocess.run(
-            curl_cmd,
-            capture_output=True,
-            text=True,
-            timeout=35
-        )
+        resp = client.get(url, timeout=PAGE_TIMEOUT)
+        if limiter:
+            limiter.observe(resp)
+        html_content = resp.text
+        
+        # Models keyed by code, so the dict is both the dedup check and the
+        # result in first-seen order
+        found = {}
         
-        if result.returncode == 0:
-            html_content = result.stdout
+        # One pass over the page, in document order
+        for match in model_pattern(manufacturer_uri).finditer(html_content):
+            model_code, model_name = [group for group in match.groups() if group is not None]
             
-            # Look for model links in the HTML
-            # Pattern 1: Direct model links like /manufacturer/model-code/parts
-            model_pattern1 = rf'href="/{manufacturer_uri}/([^/"]+)/parts"[^>]*>([^<]+)</a>'
+            # Clean up the model name
+            model_name = model_name.strip()
+            model_code = model_code.strip()
             
-            # Pattern 2: Model links in data attributes
-            model_pattern2 = r'data-model-code="([^"]+)"[^>]*data-model-name="([^"]+)"'
+            # Skip duplicates and navigation links
+            if (model_code in found or 
+                model_name in NAV_LINK_TEXT or
+                'javascript' in model_code.lower()):
+                continue
             
-            # Pattern 3: JavaScript model data
-            model_pattern3 = r'"modelCode":\s*"([^"]+)"[^}]*"modelName":\s*"([^"]+)"'
+            found[model_code] = {
+                'code': model_code,
+                'name': model_name,
+                'url': f"/{manufacturer_uri}/{model_code}/parts"
+            }
             
-            models = []
-            seen_codes = set()
+            # Cap at max_models
+            if len(found) >= max_models:
+                break
+        
+        models = list(found.values())
+        
+        # If no models found with patterns, try to find the models API endpoint
+        if not models:
+            # Look for API endpoints in the HTML
+            api_matches = MODEL_API_PATTERN.findall(html_content)
             
-            # Try all patterns
-            for pattern in [model_pattern1, model_pattern2, model_pattern3]:
-                matches = re.findall(pattern, html_content, re.IGNORECASE)
-                
-                for match in matches:
-                    if len(match) == 2:
-                        model_code, model_name = match
-                    else:
-                        continue
+            for api_path in api_matches[:3]:  # Try first 3 API endpoints found
+                if 'facets' not in api_path:  # Skip facets endpoint
+                    api_url = f"https://www.partstown.com/{api_path}"
                     
-                    # Clean up the model name
-                    model_name = model_name.strip()
-                    model_code = model_code.strip()
-                    
-                    # Skip duplicates and navigation links
-                    if (model_code in seen_codes or 
-                        model_name in ['Parts', 'Manuals', 'Home', 'Back', ''] or
-                        'javascript' in model_code.lower()):
+                    # Try to fetch from API endpoint
+                    try:
+                        api_resp = client.get(api_url, timeout=API_TIMEOUT)
+                    except httpx.HTTPError:
                         continue
                     
-                    seen_codes.add(model_code)
-                    
-                    models.append({
-                        'code': model_code,
-                        'name': model_name,
-                        'url': f"/{manufacturer_uri}/{model_code}/parts"
-                    })
-                    
-                    # Cap at max_models
-                    if len(models) >= max_models:
-                        break
-                
-                if len(models) >= max_models:
-                    break
-            
-            # If no models found with patterns, try to find the models API endpoint
-            if not models:
-                # Look for API endpoints in the HTML
-                api_pattern = r'"/([^"]*models[^"]*)"'
-                api_matches = re.findall(api_pattern, html_content)
-                
-                for api_path in api_matches[:3]:  # Try first 3 API endpoints found
-                    if 'facets' not in api_path:  # Skip facets endpoint
-                        api_url = f"https://www.partstown.com/{api_path}"
-                        
-                        # Try to fetch from API endpoint
-                        api_cmd = curl_cmd[:-1] + [api_url]
-                        api_result = subprocess.run(api_cmd, capture_output=True, text=True, timeout=10)
+                    if api_resp.status_code == 200:
+                        try:
+                            # Try to parse as JSON, straight from the body bytes
+                            data = orjson.loads(api_resp.content)
+                        except json.JSONDecodeError:
+                            continue
                         
-                        if api_result.returncode == 0:
-                            try:
-                                # Try to parse as JSON
-                                data = json.loads(api_result.stdout)
-                                
-                                # Extract models from various possible structures
-                                if isinstance(data, list):
-                                    for item in data[:max_models]:
-                                        if isinstance(item, dict):
-                                            models.append({
-                                                'code': item.get('code', item.get('modelCode', '')),
-                                                'name': item.get('name', item.get('modelName', '')),
-                                                'url': f"/{manufacturer_uri}/{item.get('code', item.get('modelCode', ''))}/parts"
-                                            })
-                                elif isinstance(data, dict):
-                                    if 'models' in data:
-                                        for item in data['models'][:max_models]:
-                                            models.append({
-                                                'code': item.get('code', item.get('modelCode', '')),
-                                                'name': item.get('name', item.get('modelName', '')),
-                                                'url': f"/{manufacturer_uri}/{item.get('code', item.get('modelCode', ''))}/parts"
-                                            })
-                                
-                                if models:
-                                    break
-                            except json.JSONDecodeError:
-                                continue
-            
-            return models
-            
-        else:
-            print(f"   ❌ Curl failed with return code {result.returncode}")
-            return []
-            
-    except subprocess.TimeoutExpired:
-        print(f"   ❌ Timeout after 35 seconds")
+                        models = models_from_api(data, manufacturer_uri, max_models)
+                        if models:
+                            break
+        
+        return models
+        
+    except httpx.TimeoutException:
+        print(f"   ❌ Timeout after {PAGE_TIMEOUT} seconds")
         return []
     except Exception as e:
         print(f"   ❌ Error: {e}")
@@ -189,13 +186,18 @@ def save_manufacturer_cache(manufacturer, models):
     if not models:
         cache_data['note'] = 'No models found via curl scraping'
     
-    with open(cache_file, 'w') as f:
-        json.dump(cache_data, f, indent=2)
+    write_model_cache(cache_file, cache_data)
     
     return cache_file
 
+def fetch_and_save(mfg, limiter):
+    """Worker: fetch one manufacturer's models and write its cache file"""
+    limiter.wait()
+    models = fetch_models_via_curl(mfg['uri'], max_models=50, limiter=limiter)
+    return models, save_manufacturer_cache(mfg, models)
+
 def update_timestamp():
-    """Update cache timestamp"""
+    """Update cache timestamp; returns the number of cache files"""
     total_files = len([f for f in os.listdir(MODELS_CACHE_DIR) if f.endswith('.json')])
     
     timestamp_data = {
@@ -206,8 +208,9 @@ def update_timestamp():
         'method': 'curl_scraping'
     }
     
-    with open(os.path.join(CACHE_DIR, 'cache_timestamp.json'), 'w') as f:
-        json.dump(timestamp_data, f, indent=2)
+    write_timestamp(os.path.join(CACHE_DIR, 'cache_timestamp.json'), timestamp_data)
+    
+    return total_files
 
 def main():
     print("=" * 60)
@@ -231,8 +234,9 @@ def main():
     if len(need_models) > 10:
         print(f"   ... and {len(need_models) - 10} more")
     
-    print(f"\n⚡ Using fast curl method (2-3 seconds per manufacturer)")
-    print(f"⏱️ Estimated time: {len(need_models) * 2.5 / 60:.1f} minutes")
+    print(f"\n⚡ Using fast HTTP method, {FETCH_WORKERS} at a time ({REQUESTS_PER_SECOND} started per second)")
+    estimate = max(len(need_models) * 2.5 / FETCH_WORKERS, len(need_models) / REQUESTS_PER_SECOND)
+    print(f"⏱️ Estimated time: {estimate / 60:.1f} minutes")
     
     response = input(f"\nProcess all {len(need_models)} manufacturers? (y/n): ")
     if response.lower() != 'y':
@@ -247,38 +251,38 @@ def main():
     print(f"\n🚀 Starting fast model fetching...")
     start_time = time.time()
     
-    for i, mfg in enumerate(need_models, 1):
-        print(f"\n[{i}/{len(need_models)}] 🏭 {mfg['name']}")
-        print(f"   URI: {mfg['uri']}")
-        
-        # Fetch models
-        models = fetch_models_via_curl(mfg['uri'], max_models=50)
-        
-        if models:
-            print(f"   ✅ Found {len(models)} models")
-            success_with_models += 1
-            total_models += len(models)
-        else:
-            print(f"   ⚠️ No models found")
-            empty_results += 1
-        
-        # Save to cache
-        cache_file = save_manufacturer_cache(mfg, models)
-        print(f"   💾 Saved: {os.path.basename(cache_file)}")
-        
-        # Progress update every 20
-        if i % 20 == 0:
-            elapsed = time.time() - start_time
-            rate = i / elapsed if elapsed > 0 else 0
-            remaining = (len(need_models) - i) / rate if rate > 0 else 0
-            print(f"\n📈 Progress: {i}/{len(need_models)} - ETA: {remaining/60:.1f} minutes")
+    limiter = RateLimiter(REQUESTS_PER_SECOND)
+    
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+        futures = {executor.submit(fetch_and_save, mfg, limiter): mfg for mfg in need_models}
         
-        # Small delay to be respectful
-        if i < len(need_models):
-            time.sleep(0.5)
+        # Results are tallied here on the main thread, so the counters need no lock
+        for i, future in enumerate(as_completed(futures), 1):
+            mfg = futures[future]
+            models, cache_file = future.result()
+            
+            print(f"\n[{i}/{len(need_models)}] 🏭 {mfg['name']}")
+            print(f"   URI: {mfg['uri']}")
+            
+            if models:
+                print(f"   ✅ Found {len(models)} models")
+                success_with_models += 1
+                total_models += len(models)
+            else:
+                print(f"   ⚠️ No models found")
+                empty_results += 1
+            
+            print(f"   💾 Saved: {os.path.basename(cache_file)}")
+            
+            # Progress update every 20
+            if i % 20 == 0:
+                elapsed = time.time() - start_time
+                rate = i / elapsed if elapsed > 0 else 0
+                remaining = (len(need_models) - i) / rate if rate > 0 else 0
+                print(f"\n📈 Progress: {i}/{len(need_models)} - ETA: {remaining/60:.1f} minutes")
     
-    # Update timestamp
-    update_timestamp()
+    # Update timestamp, counting the cache files once for the summary too
+    total_cached = update_timestamp()
     
     # Summary
     elapsed_total = time.time() - start_time
@@ -292,7 +296,6 @@ def main():
     print(f"⚡ Average time per manufacturer: {elapsed_total/len(need_models):.1f} seconds")
     
     # Final cache status
-    total_cached = len([f for f in os.listdir(MODELS_CACHE_DIR) if f.endswith('.json')])
     print(f"\n🎉 Cache coverage: {total_cached}/489 ({(total_cached / 489) * 100:.1f}%)")
 
 if __name__ == "__main__":
@@ -22,13 +22,21 @@ except ImportError:
     print("   Make sure the scraper is available in the parent directory")
     sys.exit(1)
 
+from cache_io import write_model_cache, write_timestamp
+from model_cache import cached_files
+from rate_limiter import RateLimiter
+
 # Cache directories
 CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache')
 MODELS_CACHE_DIR = os.path.join(CACHE_DIR, 'models')
 
+# At most one manufacturer started every 3 seconds, to be respectful
+REQUESTS_PER_SECOND = 1 / 3
+
 class RemainingManufacturersFetcher:
     def __init__(self, max_models_per_manufacturer=50):
         self.scraper = None
+        self.cached_count = 0  # Cache files on disk, counted once and kept up to date as we write
         self.max_models = max_models_per_manufacturer
         self.stats = {
             'processed': 0,
@@ -44,12 +52,10 @@ class RemainingManufacturersFetcher:
         with open(os.path.join(CACHE_DIR, 'manufacturers.json'), 'r') as f:
             manufacturers = json.load(f)
         
-        # Check which ones don't have cache files
-        missing = []
-        for mfg in manufacturers:
-            cache_file = os.path.join(MODELS_CACHE_DIR, f"{mfg['code']}.json")
-            if not os.path.exists(cache_file):
-                missing.append(mfg)
+        cached = cached_files(MODELS_CACHE_DIR)
+        
+        missing = [mfg for mfg in manufacturers if mfg['code'] not in cached]
+        self.cached_count = len(cached)
         
         return missing
     
@@ -88,8 +94,8 @@ class RemainingManufacturersFetcher:
                     'capped': original_count > self.max_models
                 }
                 
-                with open(cache_file, 'w') as f:
-                    json.dump(cache_data, f, indent=2)
+                write_model_cache(cache_file, cache_data)
+                self.cached_count += 1
                 
                 print(f"   💾 Saved to cache: {os.path.basename(cache_file)}")
                 
@@ -112,8 +118,8 @@ class RemainingManufacturersFetcher:
                     'note': 'No models found'
                 }
                 
-                with open(cache_file, 'w') as f:
-                    json.dump(cache_data, f, indent=2)
+                write_model_cache(cache_file, cache_data)
+                self.cached_count += 1
                 
                 return False
                 
@@ -127,11 +133,11 @@ class RemainingManufacturersFetcher:
             return False
     
     def update_cache_timestamp(self):
-        """Update the cache timestamp file"""
+        """Update the cache timestamp file; returns the number of cache files"""
         timestamp_file = os.path.join(CACHE_DIR, 'cache_timestamp.json')
         
-        # Count total cache files
-        total_cached = len([f for f in os.listdir(MODELS_CACHE_DIR) if f.endswith('.json')])
+        # Every manufacturer processed was missing a file, so each write added one
+        total_cached = self.cached_count
         
         timestamp_data = {
             'last_updated': datetime.now().isoformat(),
@@ -146,11 +152,12 @@ class RemainingManufacturersFetcher:
             }
         }
         
-        with open(timestamp_file, 'w') as f:
-            json.dump(timestamp_data, f, indent=2)
+        write_timestamp(timestamp_file, timestamp_data)
         
         print(f"\n📅 Updated cache timestamp")
         print(f"   Total cache coverage: {total_cached}/489 ({(total_cached / 489) * 100:.1f}%)")
+        
+        return total_cached
     
     async def run(self):
         """Main execution function"""
@@ -188,21 +195,18 @@ class RemainingManufacturersFetcher:
         self.scraper = PartsTownExplorer()
         print("✅ Scraper initialized")
         
-        # Process each manufacturer
+        # Process each manufacturer; the limiter spaces out request starts, so
+        # a scrape that takes longer than the gap isn't followed by a dead wait
         print(f"\n🔄 Processing {len(missing)} manufacturers...")
+        limiter = RateLimiter(REQUESTS_PER_SECOND)
         
         for i, manufacturer in enumerate(missing, 1):
+            await limiter.wait_async()
             print(f"\n[{i}/{len(missing)}] 🏭 {manufacturer['name']} ({manufacturer['code']})")
             
             self.stats['processed'] += 1
             await self.fetch_models_for_manufacturer(manufacturer)
             
-            # Rate limiting - wait between requests
-            if i < len(missing):
-                wait_time = 3  # 3 seconds between requests to be respectful
-                print(f"   ⏳ Waiting {wait_time} seconds before next request...")
-                await asyncio.sleep(wait_time)
-            
             # Progress update every 10 manufacturers
             if i % 10 == 0:
                 elapsed = time.time() - self.stats['start_time']
@@ -213,8 +217,8 @@ class RemainingManufacturersFetcher:
         # Cleanup
         print("\n🧹 Scraper cleanup complete")
         
-        # Update timestamp
-        self.update_cache_timestamp()
+        # Update timestamp, counting the cache files once for the summary too
+        total_cached = self.update_cache_timestamp()
         
         # Final summary
         elapsed_total = time.time() - self.stats['start_time']
@@ -233,7 +237,6 @@ class RemainingManufacturersFetcher:
                 print(f"   ... and {len(self.stats['failed']) - 5} more")
         
         # Final cache status
-        total_cached = len([f for f in os.listdir(MODELS_CACHE_DIR) if f.endswith('.json')])
         print(f"\n🎉 Final cache coverage: {total_cached}/489 ({(total_cached / 489) * 100:.1f}%)")
         
         if total_cached == 489:
@@ -4,82 +4,89 @@ Generate all potential manual links for a model
 Based on the pattern: /modelManual/{MANUFACTURER_PREFIX}-{MODEL_CODE}_{TYPE}.pdf
 """
 
+import functools
+import re
+
+from manual_types import MANUAL_TITLES
+
+# Common manufacturer prefixes based on what we've seen
+PREFIX_MAP = {
+    'henny-penny': 'HEN',
+    'apw-wyott': 'APW',
+    'accutemp': 'ACC',
+    'delfield': 'DEL',
+    'frymaster': 'FRY',
+    'vulcan': 'VUL',
+    'hobart': 'HOB',
+    'wells': 'WEL',
+    'star': 'STA',
+    'true': 'TRU',
+    'beverage-air': 'BEV',
+    'alto-shaam': 'ALT',
+    'garland': 'GAR',
+    'pitco': 'PIT',
+    'blodgett': 'BLO',
+    'cleveland': 'CLE',
+    'lincoln': 'LIN',
+    'middleby': 'MID',
+    'rational': 'RAT',
+    'southbend': 'SOU',
+}
+
+# Everything but letters and digits
+NON_ALNUM_PATTERN = re.compile(r'[\W_]+')
+
+@functools.lru_cache(maxsize=1024)
 def get_manufacturer_prefix(manufacturer_name):
     """Get the manufacturer prefix from the name"""
-    # Common manufacturer prefixes based on what we've seen
-    prefix_map = {
-        'henny-penny': 'HEN',
-        'apw-wyott': 'APW',
-        'accutemp': 'ACC',
-        'delfield': 'DEL',
-        'frymaster': 'FRY',
-        'vulcan': 'VUL',
-        'hobart': 'HOB',
-        'wells': 'WEL',
-        'star': 'STA',
-        'true': 'TRU',
-        'beverage-air': 'BEV',
-        'alto-shaam': 'ALT',
-        'garland': 'GAR',
-        'pitco': 'PIT',
-        'blodgett': 'BLO',
-        'cleveland': 'CLE',
-        'lincoln': 'LIN',
-        'middleby': 'MID',
-        'rational': 'RAT',
-        'southbend': 'SOU',
-    }
-    
     # Try to get from map, otherwise use first 3 letters uppercase
     manufacturer_lower = manufacturer_name.lower()
-    if manufacturer_lower in prefix_map:
-        return prefix_map[manufacturer_lower]
+    if manufacturer_lower in PREFIX_MAP:
+        return PREFIX_MAP[manufacturer_lower]
     else:
         # Take first 3 letters and uppercase
-        clean_name = ''.join(c for c in manufacturer_name if c.isalnum())
+        clean_name = NON_ALNUM_PATTERN.sub('', manufacturer_name)
         return clean_name[:3].upper() if clean_name else 'UNK'
 
-def generate_manual_links(manufacturer_uri, model_code, manufacturer_name=None):
-    """Generate all potential manual links for a model"""
-    
-    # Get manufacturer prefix
-    if not manufacturer_name:
-        manufacturer_name = manufacturer_uri
-    prefix = get_manufacturer_prefix(manufacturer_uri)
+def format_model_code(manufacturer_uri, model_code):
+    """Model code as it appears in manual filenames"""
+    # For Henny Penny, use PF prefix for numeric models
+    if manufacturer_uri == 'henny-penny' and model_code.isdigit():
+        return f'PF{model_code.upper()}'
+    # Use uppercase model code
+    return model_code.upper()
+
+def generate_manual_links_batch(manufacturer_uri, model_codes, manufacturer_name=None):
+    """
+    Generate all potential manual links for many models of one manufacturer
     
-    # Manual types
-    manual_types = [
-        ('spm', 'Service & Parts Manual'),
-        ('iom', 'Installation & Operation Manual'),
-        ('pm', 'Parts Manual'),
-        ('wd', 'Wiring Diagrams'),
-        ('sm', 'Service Manual')
-    ]
+    The prefix and each model's formatted code are worked out once, not once per manual type
     
-    manuals = []
+    Returns:
+        dict: {model_code: manuals}
+    """
+    prefix = get_manufacturer_prefix(manufacturer_uri)
     
-    # Generate links for each manual type
-    for type_code, type_name in manual_types:
-        # For Henny Penny, use PF prefix for numeric models
-        if manufacturer_uri == 'henny-penny' and model_code.isdigit():
-            # Use PF prefix for numeric models
-            model_formatted = f'PF{model_code.upper()}'
-        else:
-            # Use uppercase model code
-            model_formatted = model_code.upper()
-        
-        # Generate the link
-        link = f'/modelManual/{prefix}-{model_formatted}_{type_code}.pdf'
-        
-        manuals.append({
-            'type': type_code,
-            'title': type_name,
-            'link': link,
-            'url': link,
-            'full_url': f'https://www.partstown.com{link}'
-        })
+    links = {}
+    for model_code in model_codes:
+        base = f'/modelManual/{prefix}-{format_model_code(manufacturer_uri, model_code)}'
+        manuals = []
+        for type_code, type_name in MANUAL_TITLES.items():
+            link = f'{base}_{type_code}.pdf'
+            manuals.append({
+                'type': type_code,
+                'title': type_name,
+                'link': link,
+                'url': link,
+                'full_url': f'https://www.partstown.com{link}'
+            })
+        links[model_code] = manuals
     
-    return manuals
+    return links
+
+def generate_manual_links(manufacturer_uri, model_code, manufacturer_name=None):
+    """Generate all potential manual links for a model"""
+    return generate_manual_links_batch(manufacturer_uri, (model_code,), manufacturer_name)[model_code]
 
 if __name__ == "__main__":
     # Test with Henny Penny 500
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+On-disk cache for fetched PartsTown responses
+Repeat scrapes of the same URL are answered from cache/http instead of the network
+"""
+
+import base64
+import functools
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+HTTP_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache', 'http')
+DEFAULT_TTL = 86400 * 7  # One week
+
+def _cache_path(url):
+    """Cache file for a URL, sharded by the first two hex digits of its hash"""
+    key = hashlib.sha1(url.encode()).hexdigest()
+    return os.path.join(HTTP_CACHE_DIR, key[:2], f"{key}.json")
+
+def _encode_bytes(obj):
+    """Store raw response bodies as base64 so they survive JSON"""
+    if isinstance(obj, bytes):
+        return {'__bytes__': base64.b64encode(obj).decode('ascii')}
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+def _decode_bytes(obj):
+    if '__bytes__' in obj:
+        return base64.b64decode(obj['__bytes__'])
+    return obj
+
+def _read_entry(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f, object_hook=_decode_bytes)
+    except (OSError, ValueError):
+        return None
+
+def _write_entry(path, url, response):
+    """Write atomically so concurrent readers never see a partial file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'url': url, 'fetched_at': time.time(), 'response': response}, f, default=_encode_bytes)
+        os.replace(tmp_path, path)
+    except BaseException as e:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        # A response that can't be written or serialized just goes uncached;
+        # the caller still gets it
+        if not isinstance(e, (OSError, TypeError, ValueError)):
+            raise
+
+class _MemoryCache:
+    """Thread-safe LRU of recent cache entries, keyed by URL"""
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, url):
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry:
+                self.entries.move_to_end(url)
+            return entry
+
+    def put(self, url, entry):
+        with self.lock:
+            self.entries[url] = entry
+            self.entries.move_to_end(url)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+def disk_cache(key, ttl=DEFAULT_TTL, cache_if=bool, memory=0):
+    """
+    Cache a fetch function's JSON-serializable result on disk, keyed by URL
+    Bytes in the result round-trip as bytes; tuples come back as lists.
+
+    Args:
+        key: Callable taking the wrapped function's arguments and returning the URL
+        ttl: Seconds a cached response stays valid
+        cache_if: Predicate on the result; failed fetches should not be cached
+        memory: Keep this many recent entries in process too, so repeat lookups
+            skip the file read; the same ttl applies. Callers must not mutate
+            results, since hits return the same object
+
+    Works on plain and async functions alike. The wrapped function accepts
+    an extra force=True keyword to bypass the cache.
+    """
+    def decorator(func):
+        recent = _MemoryCache(memory) if memory else None
+
+        def fresh(entry):
+            return entry and time.time() - entry['fetched_at'] < ttl
+
+        def cached(args, kwargs, force):
+            url = key(*args, **kwargs)
+            path = _cache_path(url)
+            if not force:
+                entry = recent and recent.get(url)
+                if not fresh(entry):
+                    # Another process may have refreshed the file meanwhile
+                    entry = _read_entry(path)
+                    if entry and recent:
+                        recent.put(url, entry)
+                if fresh(entry):
+                    return url, path, entry
+            return url, path, None
+
+        def store(url, path, response):
+            if cache_if(response):
+                _write_entry(path, url, response)
+                if recent:
+                    recent.put(url, {'fetched_at': time.time(), 'response': response})
+            return response
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, force=False, **kwargs):
+                url, path, entry = cached(args, kwargs, force)
+                if entry:
+                    return entry['response']
+                return store(url, path, await func(*args, **kwargs))
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, force=False, **kwargs):
+            url, path, entry = cached(args, kwargs, force)
+            if entry:
+                return entry['response']
+            return store(url, path, func(*args, **kwargs))
+        return wrapper
+    return decorator
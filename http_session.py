@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP clients for talking to partstown.com
+One pooled HTTP/2 client per process, so the TLS handshake is paid once and
+concurrent requests multiplex over the same connection
+"""
+
+import atexit
+
+import httpx
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# Keep every connection the pool may open alive between requests, so a burst
+# of concurrent fetches (complete_cache runs 15 at once) doesn't close and
+# re-handshake connections as it drains
+LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=20, keepalive_expiry=30)
+
+# Failed connection attempts (refused, reset, DNS) are retried this many times
+# before a request errors; responses, including 5xx, are returned as-is
+RETRIES = 3
+
+# For asyncio scripts; close it with `await SESSION.aclose()` before the loop ends
+SESSION = httpx.AsyncClient(
+    transport=httpx.AsyncHTTPTransport(http2=True, limits=LIMITS, retries=RETRIES),
+    headers=DEFAULT_HEADERS,
+    timeout=10,
+    follow_redirects=True,
+)
+
+# For threaded and synchronous callers
+CLIENT = httpx.Client(
+    transport=httpx.HTTPTransport(http2=True, limits=LIMITS, retries=RETRIES),
+    headers=DEFAULT_HEADERS,
+    timeout=10,
+    follow_redirects=True,
+)
+atexit.register(CLIENT.close)
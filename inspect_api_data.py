@@ -12,6 +12,21 @@ import json
 sys.path.append('../API Scraper V2')
 from interactive_scraper import PartsTownExplorer
 
+PREVIEW_CHARS = 300
+PREVIEW_ENCODER = json.JSONEncoder(indent=2)
+
+def preview_json(data, max_chars=PREVIEW_CHARS):
+    """The start of data as indented JSON; iterencode yields pieces lazily,
+    so a large response is only encoded as far as the preview reaches"""
+    pieces = []
+    length = 0
+    for piece in PREVIEW_ENCODER.iterencode(data):
+        pieces.append(piece)
+        length += len(piece)
+        if length >= max_chars:
+            break
+    return ''.join(pieces)[:max_chars]
+
 class DataInspector(PartsTownExplorer):
     def __init__(self):
         super().__init__()
@@ -55,10 +70,10 @@ class DataInspector(PartsTownExplorer):
                                     print(f"   📊 List with {len(data)} items")
                                     print(f"   📋 First item keys: {list(data[0].keys()) if isinstance(data[0], dict) else 'Not a dict'}")
                                     if isinstance(data[0], dict):
-                                        print(f"   🔍 First item sample: {json.dumps(data[0], indent=2)[:300]}...")
+                                        print(f"   🔍 First item sample: {preview_json(data[0])}...")
                                 elif isinstance(data, dict):
                                     print(f"   📊 Dict with keys: {list(data.keys())}")
-                                    print(f"   🔍 Sample: {json.dumps(data, indent=2)[:300]}...")
+                                    print(f"   🔍 Sample: {preview_json(data)}...")
                             except Exception as e:
                                 print(f"   ❌ Error parsing JSON: {e}")
                 except Exception as e:
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Crash-safe progress log for the manual caching scripts
+Each fetched model is appended to <id>.partial.jsonl as it completes, so an
+interrupted run picks up where it stopped instead of starting over
+"""
+
+import os
+
+import orjson
+
+def progress_path(manuals_dir, manufacturer_id):
+    return os.path.join(manuals_dir, f"{manufacturer_id}.partial.jsonl")
+
+def load_progress(path):
+    """Models already fetched, keyed by model code; later lines win"""
+    entries = {}
+    try:
+        with open(path, 'rb+') as f:
+            lines = f.read().split(b'\n')
+            # Anything after the last newline is a write torn by an interrupt;
+            # cut it off so the next append starts on a fresh line
+            if lines[-1]:
+                f.truncate(f.tell() - len(lines[-1]))
+    except FileNotFoundError:
+        return entries
+
+    for line in lines[:-1]:
+        try:
+            entry = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            continue
+        entries[entry['code']] = entry
+    return entries
+
+def append_progress(f, model_code, model_name, manuals):
+    """Record one fetched model; f is the progress file opened with 'ab'"""
+    f.write(orjson.dumps({'code': model_code, 'name': model_name, 'manuals': manuals}) + b'\n')
+    f.flush()
+
+def models_with_manuals(entries):
+    """Build the models_with_manuals section of a manuals cache file"""
+    return {
+        code: {'name': entry['name'], 'manuals': entry['manuals']}
+        for code, entry in entries.items()
+        if entry['manuals']
+    }
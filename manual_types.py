@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Manual typing shared by the scrapers
+The type comes from the filename suffix, e.g. HEN-PF500_spm.pdf is a Service & Parts Manual
+"""
+
+import re
+
+MANUAL_SUFFIX_PATTERN = re.compile(r'_(spm|iom|pm|wd|sm)\.')
+MANUAL_TITLES = {
+    'spm': 'Service & Parts Manual',
+    'iom': 'Installation & Operation Manual',
+    'pm': 'Parts Manual',
+    'wd': 'Wiring Diagrams',
+    'sm': 'Service Manual',
+}
+
+def classify(href, text=''):
+    """(type, title) for a manual link; unknown suffixes are titled by their link text"""
+    match = MANUAL_SUFFIX_PATTERN.search(href)
+    if match:
+        manual_type = match.group(1)
+        return manual_type, MANUAL_TITLES[manual_type]
+    return 'unknown', (text.strip() if text else 'Manual')
+
+def manual_entry(href, text):
+    """Build the manual dict the servers return for one link"""
+    manual_type, title = classify(href, text)
+    return {
+        'type': manual_type,
+        'title': title,
+        'link': href,
+        'text': text.strip() if text else title
+    }
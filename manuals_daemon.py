@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Long-lived Playwright worker for the manual scrapers
+One browser and a small pool of contexts stay up for the life of the process;
+jobs arrive as JSON lines on stdin and results go back as JSON lines on stdout.
+fetch_manuals_subprocess and fetch_manuals_tab start it on first use and keep
+it running, so each lookup costs a page navigation instead of a fresh
+interpreter, Playwright import and Chromium launch.
+
+Set MANUALS_CDP_URL to attach to an already-running Chromium instead of
+launching one, e.g. after starting
+    chromium --headless --remote-debugging-port=9222 --user-data-dir=/tmp/pt-profile
+with MANUALS_CDP_URL=http://127.0.0.1:9222. A restarted daemon, or one per
+server process, then reuses that browser.
+"""
+
+import asyncio
+import atexit
+import itertools
+import os
+import subprocess
+import sys
+import threading
+import traceback
+from concurrent.futures import Future
+
+import orjson
+
+from manual_types import manual_entry
+
+WORKERS = 4  # Browser contexts, and so jobs in flight at once
+MANUAL_LINK_WAIT = 8000  # ms to wait for a manual link before deciding a page has none
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+CDP_URL = os.environ.get('MANUALS_CDP_URL')
+
+# Only the anchor tags matter to the scrapers, so these are never fetched
+BLOCKED_RESOURCE_TYPES = frozenset(('image', 'stylesheet', 'font', 'media'))
+BLOCKED_HOSTS = ('googletagmanager', 'google-analytics', 'doubleclick', 'facebook')
+
+MANUAL_LINK_SELECTOR = 'a[href*="/modelManual/"]'
+
+# Everywhere a manual link turns up on the Manuals tab, as one selector so the
+# page is queried once; matches come back in document order
+TAB_LINK_SELECTOR = ', '.join((
+    f'div#mdptabmanuals {MANUAL_LINK_SELECTOR}',
+    f'div.manuals-tab {MANUAL_LINK_SELECTOR}',
+    f'div.tab-content {MANUAL_LINK_SELECTOR}',
+    'a.manual-link',
+    'a[href*=".pdf"]'
+))
+# Any of the ways the Manuals tab itself is marked up, likewise in one query
+TAB_BUTTON_SELECTOR = ', '.join((
+    'a[href="#id=mdptabmanuals"]',
+    'button:has-text("Manuals")',
+    'li:has-text("Manuals")',
+    'div.tab:has-text("Manuals")'
+))
+
+# Every matched link's href and text in one round trip instead of two calls per link
+LINK_PAIRS_JS = 'els => els.map(e => [e.getAttribute("href"), e.textContent])'
+
+def log(message):
+    """Daemon diagnostics go to stderr; stdout carries only results"""
+    print(message, file=sys.stderr, flush=True)
+
+async def wait_for_links(page, selector):
+    """Return as soon as a matching link renders, or after MANUAL_LINK_WAIT if none does"""
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+    try:
+        await page.wait_for_selector(selector, timeout=MANUAL_LINK_WAIT)
+    except PlaywrightTimeoutError:
+        pass
+
+async def scrape_model_page(page, manufacturer_uri, model_code):
+    """Manual links from a model's parts page"""
+    model_url = f"https://www.partstown.com/{manufacturer_uri}/{model_code}/parts"
+
+    await page.goto(model_url, wait_until='domcontentloaded', timeout=30000)
+    await wait_for_links(page, MANUAL_LINK_SELECTOR)
+
+    manual_links = await page.eval_on_selector_all(MANUAL_LINK_SELECTOR, LINK_PAIRS_JS)
+
+    return [manual_entry(href, text) for href, text in manual_links if href]
+
+async def block_assets(route):
+    """Route handler for a browser context: abort assets and analytics, pass the rest"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(host in request.url for host in BLOCKED_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def scrape_manuals_tab(page, manufacturer_uri, model_code):
+    """Manual links from a model's Manuals tab, clicking the tab if they aren't there yet"""
+    # URL with manuals tab hash
+    model_url = f"https://www.partstown.com/{manufacturer_uri}/{model_code}/parts#id=mdptabmanuals"
+
+    # Navigate directly to manuals tab
+    log(f"DEBUG: Navigating to {model_url}")
+    await page.goto(model_url, wait_until='domcontentloaded', timeout=15000)
+
+    # Wait for tab content to load
+    await wait_for_links(page, TAB_LINK_SELECTOR)
+
+    # Debug: Check page title
+    log(f"DEBUG: Page title: {await page.title()}")
+
+    manuals = []
+    seen = set()
+
+    def add(href, text):
+        if href and '/modelManual/' in href and href not in seen:
+            seen.add(href)
+            manuals.append(manual_entry(href, text))
+
+    # Method 1: Look for links in the manuals tab content area
+    links = await page.eval_on_selector_all(TAB_LINK_SELECTOR, LINK_PAIRS_JS)
+    log(f"DEBUG: Manual link selectors found {len(links)} links")
+    for href, text in links:
+        add(href, text)
+
+    # Method 2: If no manuals found, try clicking the manuals tab first
+    if not manuals:
+        try:
+            tab = await page.query_selector(TAB_BUTTON_SELECTOR)
+            if tab:
+                await tab.click()
+                await wait_for_links(page, MANUAL_LINK_SELECTOR)
+        except Exception:
+            pass
+
+        # Now look for manual links again
+        for href, text in await page.eval_on_selector_all(MANUAL_LINK_SELECTOR, LINK_PAIRS_JS):
+            add(href, text)
+
+    return manuals
+
+SCRAPERS = {
+    'model': scrape_model_page,
+    'tab': scrape_manuals_tab,
+}
+
+# Where result lines go; claim_stdout() swaps in a private copy of stdout
+_results = sys.stdout.buffer
+
+def claim_stdout():
+    """Keep stdout for results only by pointing fd 1 at stderr, so a stray print
+    here or from the Playwright driver can't land in the middle of a result line"""
+    results = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    return results
+
+def send(message):
+    _results.write(orjson.dumps(message) + b'\n')
+    _results.flush()
+
+async def run_job(contexts, job):
+    context = await contexts.get()
+    page = None
+    try:
+        page = await context.new_page()
+        manuals = await SCRAPERS[job['mode']](page, job['manufacturer_uri'], job['model_code'])
+    except Exception as e:
+        log(f"ERROR: {job['mode']} {job['manufacturer_uri']}/{job['model_code']}: {e}")
+        log(traceback.format_exc())
+        manuals = []
+    finally:
+        # The context goes back to the pool even if closing a crashed page fails
+        try:
+            if page:
+                await page.close()
+        except Exception as e:
+            log(f"ERROR: Closing page for {job['manufacturer_uri']}/{job['model_code']}: {e}")
+        finally:
+            contexts.put_nowait(context)
+
+    send({'id': job['id'], 'manuals': manuals})
+
+async def serve(workers=WORKERS):
+    """Answer jobs from stdin until it closes, then finish what's in flight and exit"""
+    from playwright.async_api import async_playwright
+
+    playwright = await async_playwright().start()
+    browser = None
+    try:
+        if CDP_URL:
+            # Closing a connected browser only drops our contexts and disconnects
+            browser = await playwright.chromium.connect_over_cdp(CDP_URL)
+        else:
+            browser = await playwright.chromium.launch(headless=True)
+
+        # Idle contexts; waiting on the queue caps concurrency at the pool size
+        contexts = asyncio.Queue()
+        for _ in range(workers):
+            context = await browser.new_context(
+                user_agent=USER_AGENT,
+                viewport={'width': 1920, 'height': 1080}
+            )
+            await context.route('**/*', block_assets)
+            contexts.put_nowait(context)
+
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+        tasks = set()
+        while line := await reader.readline():
+            try:
+                job = orjson.loads(line)
+            except orjson.JSONDecodeError as e:
+                # One bad line shouldn't take down every job in flight
+                log(f"ERROR: Skipping malformed job line {line[:200]!r}: {e}")
+                continue
+            task = asyncio.create_task(run_job(contexts, job))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        await asyncio.gather(*tasks)
+    finally:
+        if browser:
+            await browser.close()
+        await playwright.stop()
+
+# Client side, used by the fetchers in the parent process. Any number of
+# threads can wait on the daemon at once; a reader thread matches each result
+# line to its job by id.
+_daemon = {'proc': None}
+_pending = {}
+_job_ids = itertools.count()
+_lock = threading.Lock()
+
+# Jobs submitted and not yet answered; held until the daemon replies (even to an
+# abandoned job), so no more than WORKERS ever wait inside the daemon
+_slots = threading.Semaphore(WORKERS)
+
+def _start_daemon():
+    proc = subprocess.Popen([sys.executable, __file__], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    threading.Thread(target=_read_results, args=(proc,), name='manuals-daemon', daemon=True).start()
+    atexit.register(_stop_daemon, proc)
+    return proc
+
+def _read_results(proc):
+    for line in proc.stdout:
+        message = orjson.loads(line)
+        future = _pending.pop(message['id'], None)
+        if future:
+            future.set_result(message['manuals'])
+
+    # The daemon exited; fail whatever was still waiting on it
+    with _lock:
+        if _daemon['proc'] is proc:
+            _daemon['proc'] = None
+        for job_id in list(_pending):
+            _pending.pop(job_id).set_exception(RuntimeError(f"manuals daemon exited with code {proc.wait()}"))
+
+def _stop_daemon(proc):
+    try:
+        proc.stdin.close()
+        proc.wait(timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        proc.kill()
+
+def fetch_via_daemon(mode, manufacturer_uri, model_code, timeout):
+    """
+    Run one scrape in the shared worker, starting it if needed
+
+    Args:
+        mode: 'model' for the parts page, 'tab' for the Manuals tab
+
+    Returns:
+        list: manual dicts
+
+    Raises:
+        TimeoutError if no answer arrives within timeout seconds of the job
+        being sent; RuntimeError if the worker dies first
+    """
+    future = Future()
+    job_id = next(_job_ids)
+    line = orjson.dumps({
+        'id': job_id,
+        'mode': mode,
+        'manufacturer_uri': manufacturer_uri,
+        'model_code': model_code
+    }) + b'\n'
+
+    # Only send once the daemon has a free context, so the timeout covers the
+    # scrape itself rather than time spent queued behind other jobs
+    _slots.acquire()
+    future.add_done_callback(lambda _: _slots.release())
+
+    with _lock:
+        _pending[job_id] = future
+        try:
+            if _daemon['proc'] is None:
+                _daemon['proc'] = _start_daemon()
+            proc = _daemon['proc']
+            proc.stdin.write(line)
+            proc.stdin.flush()
+        except OSError as e:
+            # Died since the last job; the next call starts a new one
+            _pending.pop(job_id, None)
+            _daemon['proc'] = None
+            _slots.release()
+            raise RuntimeError(f"manuals daemon is not running: {e}") from e
+
+    # On timeout the job stays pending; its late answer frees the slot
+    return future.result(timeout=timeout)
+
+if __name__ == "__main__":
+    _results = claim_stdout()
+    asyncio.run(serve())
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Lookups over cache/models, one <manufacturer code>.json file per manufacturer
+One directory read finds every cached manufacturer, and only files small
+enough to have an empty models list are ever opened
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+
+CACHE_READ_WORKERS = 16  # Threads reading model cache files in empty_codes
+
+# A cache file with no models holds only the manufacturer, a timestamp and a
+# note, so anything bigger has models and needn't be parsed to tell
+EMPTY_CACHE_MAX_BYTES = 4096
+
+def cached_files(models_dir):
+    """Model cache files (os.DirEntry) keyed by manufacturer code; {} if the directory is missing"""
+    try:
+        with os.scandir(models_dir) as it:
+            return {entry.name[:-5]: entry for entry in it if entry.name.endswith('.json')}
+    except FileNotFoundError:
+        return {}
+
+def has_no_models(entry):
+    """Whether a model cache file (an os.DirEntry) has an empty models list"""
+    if entry.stat().st_size > EMPTY_CACHE_MAX_BYTES:
+        return False
+    with open(entry.path, 'rb') as f:
+        return len(orjson.loads(f.read()).get('models', [])) == 0
+
+def empty_codes(entries):
+    """Manufacturer codes of the given cache files that have no models, read in parallel"""
+    entries = list(entries)
+    with ThreadPoolExecutor(max_workers=CACHE_READ_WORKERS) as executor:
+        return {entry.name[:-5] for entry, is_empty in zip(entries, executor.map(has_no_models, entries)) if is_empty}
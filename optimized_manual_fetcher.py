@@ -14,6 +14,11 @@ import requests
 from typing import List, Dict, Tuple, Optional
 from fetch_manuals_subprocess import fetch_manuals_for_model
 
+# Model code pieces used when building URL variants
+DIGIT_PATTERN = re.compile(r'\d')
+NUMERIC_TAIL_PATTERN = re.compile(r'\d+.*')
+ALPHA_PREFIX_PATTERN = re.compile(r'([a-zA-Z]+)')
+
 class PartsTownManualFetcher:
     """
     Optimized manual fetcher combining patterns and scraping
@@ -167,7 +172,7 @@ class PartsTownManualFetcher:
                         # Template formatting failed, skip this combination
                         continue
         
-        return list(set(candidates))  # Remove duplicates
+        return list(dict.fromkeys(candidates))  # Remove duplicates, keeping template order
     
     def _generate_model_variants(self, model_code: str) -> Dict[str, str]:
         """
@@ -183,8 +188,8 @@ class PartsTownManualFetcher:
         }
         
         # Remove numeric suffixes for abbreviations
-        if re.search(r'\d', model_code):
-            alpha_part = re.sub(r'\d+.*', '', model_code).upper()
+        if DIGIT_PATTERN.search(model_code):
+            alpha_part = NUMERIC_TAIL_PATTERN.sub('', model_code).upper()
             if alpha_part:
                 variants['alpha_only'] = alpha_part
         
@@ -196,7 +201,7 @@ class PartsTownManualFetcher:
         Examples: gdm-49 -> GDM, t-23 -> T
         """
         # Extract alphabetic part before numbers
-        match = re.match(r'([a-zA-Z]+)', model_code)
+        match = ALPHA_PREFIX_PATTERN.match(model_code)
         if match:
             return match.group(1).upper()
         return model_code.upper()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Request rate limiting shared by the scraping scripts
+Keeps concurrent workers under a requests-per-second budget for partstown.com,
+and slows all of them down when the site starts answering 429/503
+"""
+
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Responses that mean the server wants fewer requests
+THROTTLE_STATUSES = frozenset((429, 503))
+
+# Longest gap, in seconds, backing off will stretch the interval or a Retry-After pause to
+MAX_INTERVAL = 30
+
+def retry_after_seconds(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class RateLimiter:
+    """Token-bucket style limiter that is safe to share across threads and tasks"""
+
+    def __init__(self, rps):
+        self.base_interval = 1.0 / rps
+        self.interval = self.base_interval
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _reserve(self):
+        """Claim the next request slot and return how long until it opens"""
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(self.next_time, now) + self.interval
+        return delay
+
+    def wait(self):
+        """Block until the caller may issue its next request"""
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self):
+        """Like wait(), but yields to the event loop instead of blocking it"""
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def observe(self, response):
+        """Adapt to a response: back off on 429/503, ease back to the configured rate otherwise"""
+        with self.lock:
+            if response.status_code in THROTTLE_STATUSES:
+                ceiling = max(MAX_INTERVAL, self.base_interval)
+                self.interval = min(self.interval * 2, ceiling)
+                # Nobody sharing this limiter starts a request before Retry-After is up
+                retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+                if retry_after:
+                    self.next_time = max(self.next_time, time.monotonic() + min(retry_after, ceiling))
+            elif response.status_code < 400:
+                self.interval = max(self.base_interval, self.interval * 0.75)
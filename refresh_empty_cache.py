@@ -7,9 +7,11 @@ Calls the running server's API to trigger proper model fetching.
 import json
 import os
 import requests
-import time
 from datetime import datetime
 
+from cache_io import write_model_cache
+from rate_limiter import RateLimiter
+
 # Cache directories
 CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache')
 MODELS_CACHE_DIR = os.path.join(CACHE_DIR, 'models')
@@ -17,6 +19,9 @@ MODELS_CACHE_DIR = os.path.join(CACHE_DIR, 'models')
 # Server URL (make sure server.py is running, not server_cached.py)
 SERVER_URL = "http://localhost:8888"
 
+# At most one server request every 2 seconds
+REQUESTS_PER_SECOND = 0.5
+
 def get_empty_manufacturers():
     """Get list of manufacturers with empty model arrays"""
     with open(os.path.join(CACHE_DIR, 'manufacturers.json'), 'r') as f:
@@ -74,8 +79,7 @@ def update_cache_file(manufacturer, models):
         'source': 'refresh_cache_script'
     }
     
-    with open(manufacturer['cache_file'], 'w') as f:
-        json.dump(cache_data, f, indent=2)
+    write_model_cache(manufacturer['cache_file'], cache_data)
     
     return True
 
@@ -127,9 +131,13 @@ def main():
     # Process manufacturers
     success_count = 0
     failed = []
+    limiter = RateLimiter(REQUESTS_PER_SECOND)
     
     for i, mfg in enumerate(empty[:test_batch], 1):
         print(f"\n[{i}/{test_batch}] {mfg['name']} ({mfg['code']})")
+        
+        # Rate limiting - only waits if the last request finished early
+        limiter.wait()
         print(f"   Fetching from server...")
         
         models = fetch_models_from_server(mfg['code'])
@@ -146,11 +154,6 @@ def main():
         else:
             print(f"   ❌ Failed to fetch")
             failed.append(mfg)
-        
-        # Rate limiting
-        if i < test_batch:
-            print("   ⏳ Waiting 2 seconds...")
-            time.sleep(2)
     
     # Summary
     print("\n" + "=" * 60)
@@ -7,6 +7,8 @@ This will allow the app to show 404 for missing manufacturers rather than empty
 import json
 import os
 
+from cache_io import write_timestamp
+
 # Cache directories
 CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache')
 MODELS_CACHE_DIR = os.path.join(CACHE_DIR, 'models')
@@ -67,8 +69,7 @@ def main():
             timestamp_data['cache_completion'] = f"{(remaining / 489) * 100:.1f}%"
             timestamp_data['note'] = "Removed empty cache files"
             
-            with open(timestamp_file, 'w') as f:
-                json.dump(timestamp_data, f, indent=2)
+            write_timestamp(timestamp_file, timestamp_data)
             
             print(f"\n📈 Cache coverage: {remaining}/489 ({(remaining / 489) * 100:.1f}%)")
     
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Scraper jobs for server_new.py, run in a child process
+Usage:
+    python scraper_worker.py manufacturers
+    python scraper_worker.py models <manufacturer_uri> <manufacturer_code>
+    python scraper_worker.py pdf <pdf_url>
+
+manufacturers and models print their result as JSON on the last line of
+stdout; pdf writes the raw bytes behind a PDF_FRAME_HEADER as soon as it
+has them, before closing its browser.
+"""
+
+import asyncio
+import json
+import os
+import struct
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'API Scraper V2'))
+
+# Header the pdf job writes ahead of the PDF bytes on stdout:
+# success flag, then payload length
+PDF_FRAME_HEADER = '<BI'
+
+async def get_manufacturers():
+    from interactive_scraper import PartsTownExplorer
+
+    explorer = PartsTownExplorer()
+    return await explorer.get_manufacturers()
+
+async def get_models(manufacturer_uri, manufacturer_code):
+    from interactive_scraper import PartsTownExplorer
+
+    explorer = PartsTownExplorer()
+    return await explorer.get_models_for_manufacturer(manufacturer_uri, manufacturer_code)
+
+def write_pdf_frame(pdf_content):
+    """Raw bytes behind a (status, length) header, instead of base64 text"""
+    if pdf_content:
+        frame = struct.pack(PDF_FRAME_HEADER, 1, len(pdf_content)) + pdf_content
+    else:
+        message = b"No PDF content"
+        frame = struct.pack(PDF_FRAME_HEADER, 0, len(message)) + message
+    sys.stdout.buffer.write(frame)
+    sys.stdout.buffer.flush()
+
+async def download_pdf(url):
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(
+            headless=True,
+            args=['--disable-blink-features=AutomationControlled']
+        )
+        context = await browser.new_context(
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            viewport={'width': 1920, 'height': 1080}
+        )
+
+        # Set extra headers for PartsTown
+        await context.set_extra_http_headers({
+            "X-Requested-With": "XMLHttpRequest",
+            "Accept": "application/pdf,*/*"
+        })
+
+        page = await context.new_page()
+
+        # First navigate to PartsTown to establish session
+        await page.goto("https://www.partstown.com", wait_until='domcontentloaded')
+        await page.wait_for_timeout(1000)
+
+        pdf_content = None
+
+        # Try using page.request.get() first
+        try:
+            response = await page.request.get(url)
+            if response.ok:
+                pdf_content = await response.body()
+        except:
+            pass
+
+        # Fallback: Try download with expect_download
+        if not pdf_content:
+            try:
+                download_page = await context.new_page()
+
+                async with download_page.expect_download(timeout=30000) as download_info:
+                    await download_page.goto(url)
+
+                download = await download_info.value
+
+                # Read Playwright's own copy of the download; it is removed with the context
+                with open(await download.path(), 'rb') as f:
+                    pdf_content = f.read()
+
+                await download_page.close()
+            except:
+                pass
+
+        # Hand the PDF over before closing the browser; the server stops
+        # reading once it has the frame
+        write_pdf_frame(pdf_content)
+        await browser.close()
+
+def main(argv):
+    command, args = argv[0], argv[1:]
+
+    if command == 'pdf':
+        asyncio.run(download_pdf(*args))
+    elif command == 'manufacturers':
+        print(json.dumps(asyncio.run(get_manufacturers())))
+    elif command == 'models':
+        print(json.dumps(asyncio.run(get_models(*args))))
+    else:
+        sys.exit(f"Unknown command: {command}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
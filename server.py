@@ -14,7 +14,6 @@ from threading import Thread
 from queue import Queue
 import requests
 import PyPDF2
-import tempfile
 from io import BytesIO
 import base64
 import hashlib
@@ -22,6 +21,7 @@ from datetime import datetime, timedelta
 import shutil
 import uuid
 import secrets
+import re
 import concurrent.futures
 
 # Add parent directory to path to import the scraper
@@ -45,6 +45,10 @@ CACHE_DURATION = 300  # 5 minutes cache
 TEMP_PDF_DIR = os.path.join(os.path.dirname(__file__), 'public', 'temp-pdfs')
 PDF_CLEANUP_HOURS = 24  # Clean up PDFs older than 24 hours
 
+# First JSON array in a part-predictor response page; the negated class finds
+# the same span as a lazy .*? without backtracking
+JSON_ARRAY_PATTERN = re.compile(r'\[[^\]\n]*\]')
+
 # Session-based PDF tracking
 session_pdfs = {}  # Maps session_id to list of PDF filenames
 
@@ -82,13 +86,13 @@ class AsyncScraper:
         
     async def get_models_with_pool(self, manufacturer_uri, manufacturer_code):
         """Get models using browser pool"""
-        browser_id = None
+        page_id = None
         page = None
         
         try:
-            # Get browser from pool
-            browser_id, browser, context, page = await self.browser_pool.get_browser()
-            print(f"🔧 Using browser {browser_id} for {manufacturer_uri}")
+            # Get a page from the shared browser
+            page_id, page = await self.browser_pool.acquire_page()
+            print(f"🔧 Using page {page_id} for {manufacturer_uri}")
             
             # Navigate to the models page
             models_url = f"https://www.partstown.com/{manufacturer_uri}/parts?v={int(time.time()*1000)}&narrow=#id=mdptabmodels"
@@ -157,25 +161,21 @@ class AsyncScraper:
             print(f"❌ Error fetching models: {e}")
             return []
         finally:
-            # Release browser back to pool
-            if browser_id:
-                await self.browser_pool.release_browser(browser_id, page)
+            # Return the page to the pool
+            if page_id:
+                await self.browser_pool.release_page(page)
         
     def run_async(self, coro):
         """Run an async function with proper event loop management"""
         request_id = str(request_uuid.uuid4())[:8]
         
-        # Serialize ALL requests to prevent browser conflicts
+        # Serialize ALL requests to prevent browser conflicts; waiting
+        # requests block on the lock and wake as soon as it is released
         with self.lock:
             try:
                 print(f"🔐 Starting request {request_id}")
                 self.active_requests[request_id] = True
                 
-                # Add a delay between requests to prevent browser conflicts
-                if len(self.active_requests) > 1:
-                    print(f"⏳ Waiting for other requests to complete...")
-                    time.sleep(2.0)
-                
                 # Create new event loop but DON'T close it immediately
                 # This keeps Playwright objects alive
                 loop = asyncio.new_event_loop()
@@ -204,8 +204,6 @@ class AsyncScraper:
                 if request_id in self.active_requests:
                     del self.active_requests[request_id]
                 print(f"🔓 Released request {request_id}")
-                # Add a delay after releasing to ensure cleanup
-                time.sleep(0.5)
 
 # Initialize scraper as singleton
 scraper = None
@@ -386,7 +384,6 @@ def get_models(manufacturer_id):
                 
                 try:
                     import json
-                    import re
                     
                     # Collect all models from different methods
                     all_models = models.copy()
@@ -407,7 +404,7 @@ def get_models(manufacturer_id):
                     for limit in [500, 1000]:
                         content = scraper_instance.run_async(fetch_with_limit(limit))
                         if content:
-                            json_match = re.search(r'\[.*?\]', content)
+                            json_match = JSON_ARRAY_PATTERN.search(content)
                             if json_match:
                                 try:
                                     extended = json.loads(json_match.group())
@@ -437,7 +434,7 @@ def get_models(manufacturer_id):
                             
                             content = scraper_instance.run_async(fetch_page())
                             if content:
-                                json_match = re.search(r'\[.*?\]', content)
+                                json_match = JSON_ARRAY_PATTERN.search(content)
                                 if json_match:
                                     try:
                                         page_models = json.loads(json_match.group())
@@ -668,13 +665,11 @@ def get_manual_metadata():
                         await download_page.goto(manual_url)
                     
                     download = await download_info.value
-                    temp_path = os.path.join(tempfile.gettempdir(), "temp.pdf")
-                    await download.save_as(temp_path)
                     
-                    with open(temp_path, 'rb') as f:
+                    # Read Playwright's own copy of the download; it is removed with the context
+                    with open(await download.path(), 'rb') as f:
                         content = f.read()
                     
-                    os.unlink(temp_path)
                     await download_page.close()
                     
                     print(f"✅ Downloaded via navigation: {len(content)} bytes")
@@ -321,7 +321,7 @@ def get_manual_metadata():
             print(f"📝 Tracking PDF for session {session_id}: {pdf_filename}")
         
         # Generate preview and get PDF metadata
-        preview_data, page_count = generate_pdf_preview_and_metadata(pdf_path)
+        preview_data, page_count = generate_pdf_preview_and_metadata(pdf_content)
         
         # Format file size
         file_size_mb = len(pdf_content) / (1024 * 1024)
@@ -350,13 +350,13 @@ def get_manual_metadata():
         print(f"❌ Error processing manual: {e}")
         return jsonify({'error': str(e)}), 500
 
-def generate_pdf_preview_and_metadata(pdf_path):
-    """Generate a preview image for the PDF and return metadata"""
+def generate_pdf_preview_and_metadata(pdf_content):
+    """Generate a preview image for the PDF bytes and return metadata"""
     try:
         # Try PyMuPDF first (faster and better quality)
         try:
             import fitz  # PyMuPDF
-            doc = fitz.open(pdf_path)
+            doc = fitz.open(stream=pdf_content, filetype="pdf")
             page_count = len(doc)  # Get total page count
             page = doc[0]  # Get first page
             pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x zoom for better quality
@@ -371,18 +371,18 @@ def generate_pdf_preview_and_metadata(pdf_path):
             print("PyMuPDF not available, trying pdf2image...")
             
             # Fallback to pdf2image
-            from pdf2image import convert_from_path
+            from pdf2image import convert_from_bytes
             import fitz
             
             # Get page count using PyMuPDF even if preview fails
             try:
-                doc = fitz.open(pdf_path)
+                doc = fitz.open(stream=pdf_content, filetype="pdf")
                 page_count = len(doc)
                 doc.close()
             except:
                 page_count = None
             
-            images = convert_from_path(pdf_path, first_page=1, last_page=1, dpi=150)
+            images = convert_from_bytes(pdf_content, first_page=1, last_page=1, dpi=150)
             
             if images:
                 img_buffer = BytesIO()
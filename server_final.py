@@ -8,7 +8,6 @@ from flask_cors import CORS
 import sys
 import os
 import time
-import requests
 import PyPDF2
 import tempfile
 from io import BytesIO
@@ -20,6 +19,8 @@ import uuid
 import secrets
 import json
 
+from http_session import CLIENT
+
 # Add the scraper to the path
 sys.path.append('../API Scraper V2')
 from sync_scraper import PartsTownSyncScraper
@@ -175,9 +176,7 @@ def get_manual_metadata():
         # Download the PDF if not already cached
         if not os.path.exists(local_path):
             print(f"📥 Downloading PDF: {manual_url}")
-            response = requests.get(manual_url, headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }, timeout=30)
+            response = CLIENT.get(manual_url, timeout=30)
             
             if response.status_code == 200:
                 with open(local_path, 'wb') as f:
@@ -16,8 +16,8 @@ import requests
 import PyPDF2
 import tempfile
 from io import BytesIO
-import base64
 import hashlib
+import struct
 from datetime import datetime, timedelta
 import shutil
 import uuid
@@ -26,6 +26,8 @@ import subprocess
 import json
 import threading
 
+from scraper_worker import PDF_FRAME_HEADER
+
 app = Flask(__name__, static_folder='public', static_url_path='/public')
 app.secret_key = secrets.token_hex(32)  # Generate a secure secret key
 CORS(app, origins=['http://localhost:3000', 'http://localhost:3001'], supports_credentials=True)
@@ -42,6 +44,11 @@ scraper_cache = {
 CACHE_DURATION = 300  # 5 minutes cache
 TEMP_PDF_DIR = os.path.join(os.path.dirname(__file__), 'public', 'temp-pdfs')
 PDF_CLEANUP_HOURS = 24  # Clean up PDFs older than 24 hours
+PDF_DOWNLOAD_TIMEOUT = 45  # seconds before a download worker is killed
+
+# The scraper jobs live in a real module so their bytecode is cached, and
+# arguments go through argv instead of being formatted into source
+WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), 'scraper_worker.py')
 
 # Session-based PDF tracking
 session_pdfs = {}  # Maps session_id to list of PDF filenames
@@ -79,26 +86,9 @@ def get_manufacturers_sync():
             return scraper_cache['manufacturers']
     
     # Run the scraper in a subprocess
-    script = """
-import asyncio
-import sys
-import os
-sys.path.append('../API Scraper V2')
-from interactive_scraper import PartsTownExplorer
-
-async def main():
-    explorer = PartsTownExplorer()
-    manufacturers = await explorer.get_manufacturers()
-    return manufacturers
-
-result = asyncio.run(main())
-import json
-print(json.dumps(result))
-"""
-    
     try:
         result = subprocess.run(
-            ['python3', '-c', script],
+            [sys.executable, WORKER_SCRIPT, 'manufacturers'],
             capture_output=True,
             text=True,
             timeout=30,
@@ -142,26 +132,9 @@ def get_models_sync(manufacturer_uri, manufacturer_code):
     print(f"DEBUG: Cache miss for {manufacturer_code}, fetching fresh data")
     
     # Run the scraper in a subprocess
-    script = f"""
-import asyncio
-import sys
-import os
-sys.path.append('../API Scraper V2')
-from interactive_scraper import PartsTownExplorer
-
-async def main():
-    explorer = PartsTownExplorer()
-    models = await explorer.get_models_for_manufacturer('{manufacturer_uri}', '{manufacturer_code}')
-    return models
-
-result = asyncio.run(main())
-import json
-print(json.dumps(result))
-"""
-    
     try:
         result = subprocess.run(
-            ['python3', '-c', script],
+            [sys.executable, WORKER_SCRIPT, 'models', manufacturer_uri, manufacturer_code],
             capture_output=True,
             text=True,
             timeout=60,
@@ -199,6 +172,29 @@ print(json.dumps(result))
         print(f"Exception getting models: {e}")
         return []
 
+def read_pdf_frame(stream):
+    """PDF bytes from the download subprocess's stdout, or None on failure"""
+    header_size = struct.calcsize(PDF_FRAME_HEADER)
+    header = stream.read(header_size)
+    if len(header) < header_size:
+        return None
+    ok, length = struct.unpack(PDF_FRAME_HEADER, header)
+    payload = stream.read(length)
+    if len(payload) != length:
+        return None
+    if not ok:
+        print(f"Error downloading PDF: {payload.decode(errors='replace')}")
+        return None
+    return payload
+
+def reap_worker(proc, timer):
+    """Let a worker finish its teardown in the background, then stop its kill timer"""
+    # Drain rather than close stdout, so a late write can't fail the teardown
+    proc.stdout.read()
+    proc.stdout.close()
+    proc.wait()
+    timer.cancel()
+
 def download_pdf_sync(pdf_url):
     """Download a PDF using subprocess and Playwright"""
     
@@ -214,98 +210,31 @@ def download_pdf_sync(pdf_url):
             return f.read()
     
     # Download using Playwright in subprocess
-    script = f"""
-import asyncio
-from playwright.async_api import async_playwright
-import base64
-import tempfile
-import os
-
-async def download_pdf(url):
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=['--disable-blink-features=AutomationControlled']
-        )
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            viewport={{'width': 1920, 'height': 1080}}
-        )
-        
-        # Set extra headers for PartsTown
-        await context.set_extra_http_headers({{
-            "X-Requested-With": "XMLHttpRequest",
-            "Accept": "application/pdf,*/*"
-        }})
-        
-        page = await context.new_page()
-        
-        # First navigate to PartsTown to establish session
-        await page.goto("https://www.partstown.com", wait_until='domcontentloaded')
-        await page.wait_for_timeout(1000)
-        
-        pdf_content = None
-        
-        # Try using page.request.get() first
-        try:
-            response = await page.request.get(url)
-            if response.ok:
-                pdf_content = await response.body()
-        except:
-            pass
-        
-        # Fallback: Try download with expect_download
-        if not pdf_content:
-            try:
-                download_page = await context.new_page()
-                
-                async with download_page.expect_download(timeout=30000) as download_info:
-                    await download_page.goto(url)
-                
-                download = await download_info.value
-                temp_path = os.path.join(tempfile.gettempdir(), "temp.pdf")
-                await download.save_as(temp_path)
-                
-                with open(temp_path, 'rb') as f:
-                    pdf_content = f.read()
-                
-                os.unlink(temp_path)
-                await download_page.close()
-            except:
-                pass
-        
-        await browser.close()
-        
-        if pdf_content:
-            # Return base64 encoded
-            return base64.b64encode(pdf_content).decode('utf-8')
-        else:
-            return ""
-
-result = asyncio.run(download_pdf('{pdf_url}'))
-print(result)
-"""
-    
     try:
-        result = subprocess.run(
-            ['python3', '-c', script],
-            capture_output=True,
-            text=True,
-            timeout=45,
+        # The worker's stderr goes straight to ours
+        proc = subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT, 'pdf', pdf_url],
+            stdout=subprocess.PIPE,
             cwd=os.path.dirname(__file__)
         )
         
-        if result.returncode == 0 and result.stdout.strip():
-            # Decode base64 and save
-            pdf_data = base64.b64decode(result.stdout.strip())
-            
+        # Return as soon as the frame is read instead of waiting for the worker
+        # to close its browser; it is killed if still running after the timeout
+        timer = threading.Timer(PDF_DOWNLOAD_TIMEOUT, proc.kill)
+        timer.start()
+        try:
+            pdf_data = read_pdf_frame(proc.stdout)
+        finally:
+            Thread(target=reap_worker, args=(proc, timer), daemon=True).start()
+        
+        if pdf_data:
             # Save to file
             with open(local_path, 'wb') as f:
                 f.write(pdf_data)
             
             return pdf_data
         else:
-            print(f"Error downloading PDF: {result.stderr}")
+            print(f"Error downloading PDF: no PDF from worker")
             return None
     except Exception as e:
         print(f"Exception downloading PDF: {e}")